@@ -3,6 +3,10 @@ Configuration module for XRF Data Manager.
 Contains atomic numbers, oxide conversion factors, and other constants.
 """
 
+from types import MappingProxyType
+
+import pandas as pd
+
 # Atomic numbers for all elements
 ATOMIC_NUMBERS = {
     'H': 1, 'He': 2, 'Li': 3, 'Be': 4, 'B': 5, 'C': 6, 'N': 7, 'O': 8,
@@ -24,6 +28,9 @@ ATOMIC_NUMBERS = {
     'Fl': 114, 'Mc': 115, 'Lv': 116, 'Ts': 117, 'Og': 118
 }
 
+# Atomic numbers indexed by element symbol, for bulk Series.map lookups
+ATOMIC_NUMBERS_SERIES = pd.Series(ATOMIC_NUMBERS, dtype='int16')
+
 # Oxide conversion factors using standard stoichiometry
 # Element to (oxide formula, conversion factor)
 OXIDE_FACTORS = {
@@ -84,3 +91,7 @@ OXIDE_FACTORS = {
 # Constants
 PPM_TO_PERCENT = 0.0001  # 1 ppm = 0.0001%
 TRACE_THRESHOLD = 1000   # ppm (0.1%)
+
+# Freeze the lookup tables so they cannot be modified at runtime
+ATOMIC_NUMBERS = MappingProxyType(ATOMIC_NUMBERS)
+OXIDE_FACTORS = MappingProxyType(OXIDE_FACTORS)
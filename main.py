@@ -6,6 +6,8 @@ Launches the wizard interface for processing XRF data files.
 """
 
 import sys
+import multiprocessing
+
 from qtpy.QtWidgets import QApplication
 
 from src.views.main_window import XRFWizard
@@ -22,4 +24,8 @@ def main():
 
 
 if __name__ == "__main__":
+    # .qan files are parsed in worker processes; in a frozen (PyInstaller)
+    # build each worker starts this executable, which must then run the
+    # worker instead of opening another wizard
+    multiprocessing.freeze_support()
     main()
@@ -4,19 +4,60 @@ Handles exporting data to a concatenated CSV file.
 """
 
 import os
-import sys
-from typing import Dict, Any, List
+import csv
+import logging
+from typing import Dict, Any, List, Iterator
 
 import pandas as pd
 import numpy as np
 
-# Add parent directory to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
-from src.models.lookup_table import get_lookup_data_by_sample_id
-from src.models.qan_parser import read_qan_file
+# The application runs from the repository root, so the src package and the
+# top-level config module are importable without editing sys.path
+from src.models.element_data import CONCENTRATION_UNITS, oxide_form_arrays
+from src.models.lookup_table import build_lookup_index, get_lookup_data_from_index
+from src.models.parse_cache import iter_cached_qan_files
 import config
 
+logger = logging.getLogger(__name__)
+
+# Summary rows appended to the generated tables; not element data
+SUMMARY_ROWS = frozenset({'Total', 'Balance', 'Trace'})
+
+# Lookup table fields carried into the concatenated table
+LOOKUP_FIELDS = ('sample_id', 'notebook_id', 'client_id', 'report_abbreviation')
+
+# File extensions saved as binary columnar tables instead of CSV
+BINARY_TABLE_FORMATS = ('.feather', '.parquet')
+
+# String columns of the concatenated table whose values repeat across rows
+CATEGORICAL_COLUMNS = (
+    'Sample ID', 'Notebook ID', 'Client ID', 'Report Abbreviation',
+    'Element', 'Unit', 'Omnian', 'Oxide'
+)
+
+# Write buffer for streamed CSV output, so rows reach the disk in large
+# blocks instead of one small write per few rows
+CSV_WRITE_BUFFER_SIZE = 1 << 20
+
+# Tables read by create_concatenated_dataframe, in priority order (oxide
+# tables first for ternary plotting), with their (is_oxide, is_major) flags
+CONCATENATED_TABLE_ORDER = (
+    ('relative_major_oxides', True, True),
+    ('absolute_major_oxides', True, True),
+    ('relative_trace_oxides', True, False),
+    ('absolute_trace_oxides', True, False),
+    ('relative_major_elements', False, True),
+    ('absolute_major_elements', False, True),
+    ('relative_trace_elements', False, False),
+    ('absolute_trace_elements', False, False),
+)
+
+# Columns of the concatenated flat table, in output order
+CONCATENATED_COLUMNS = [
+    'Line', 'Sample ID', 'Notebook ID', 'Client ID', 'Report Abbreviation',
+    'Z', 'Element', 'Concentration', 'Unit', 'Wt.%', 'Omnian', 'Oxide', 'OxideConc.wt%'
+]
+
 
 def save_to_csv(
     tables: Dict[str, pd.DataFrame],
@@ -42,6 +83,17 @@ def save_to_csv(
         return False
     
     try:
+        # Stream rows straight from raw QAN data if available
+        is_binary_format = os.path.splitext(csv_path)[1].lower() in BINARY_TABLE_FORMATS
+        if qan_files and not is_binary_format:
+            save_to_csv_streaming(qan_files, csv_path, lookup_table)
+            return True
+        
+        # Without raw QAN data, stream the generated tables one at a time
+        if not qan_files and not is_binary_format:
+            save_tables_to_csv_streaming(tables, csv_path, lookup_table)
+            return True
+        
         # Create concatenated DataFrame from raw QAN data if available
         if qan_files:
             concatenated_df = create_concatenated_dataframe_from_qan(qan_files, metadata, lookup_table)
@@ -49,192 +101,326 @@ def save_to_csv(
             # Fallback to old method
             concatenated_df = create_concatenated_dataframe(tables, metadata, lookup_table)
         
-        # Save to CSV
-        concatenated_df.to_csv(csv_path, index=False)
+        # Save in the format given by the file extension
+        save_to_table(concatenated_df, csv_path)
         return True
     
     except Exception as e:
-        print(f"Error saving CSV file: {str(e)}")
+        logger.error("Error saving CSV file: %s", e)
         return False
 
 
-def create_concatenated_dataframe(
+def save_to_table(df: pd.DataFrame, path: str) -> None:
+    """
+    Save a concatenated DataFrame in the format given by the file extension.
+    
+    '.feather' and '.parquet' write binary columnar files (requires pyarrow),
+    which keep dtypes and reload much faster than CSV; any other extension
+    is written as CSV by pandas, so the CSV format does not depend on which
+    optional packages are installed.
+    
+    Args:
+        df: Concatenated DataFrame
+        path: Path to save the table
+    """
+    extension = os.path.splitext(path)[1].lower()
+    
+    # Repeating string columns are stored as dictionary-encoded categories in
+    # the binary formats; the CSV writer formats plain strings faster, so the
+    # conversion is skipped for CSV
+    if extension in BINARY_TABLE_FORMATS:
+        df = df.astype({column: 'category' for column in CATEGORICAL_COLUMNS if column in df.columns})
+    
+    if extension == '.feather':
+        df.to_feather(path)
+    elif extension == '.parquet':
+        df.to_parquet(path, index=False, compression='zstd')
+    else:
+        df.to_csv(path, index=False)
+
+
+def save_to_csv_streaming(
+    qan_files: List[str],
+    csv_path: str,
+    lookup_table: List[Dict[str, str]]
+) -> None:
+    """
+    Write the concatenated table to CSV directly from raw QAN files.
+    
+    Rows are written as each file is parsed, so memory use is bounded by
+    a single QAN file rather than the whole project.
+    
+    Args:
+        qan_files: List of paths to .qan files
+        csv_path: Path to save CSV file
+        lookup_table: Sample lookup table
+    """
+    with open(csv_path, 'w', newline='', buffering=CSV_WRITE_BUFFER_SIZE) as file:
+        # Match the line endings DataFrame.to_csv writes
+        writer = csv.writer(file, lineterminator=os.linesep)
+        writer.writerow(CONCATENATED_COLUMNS)
+        
+        # Bind per-row lookups once, outside the element loop
+        write_row = writer.writerow
+        ppm_to_percent = config.PPM_TO_PERCENT
+        get_oxide = config.OXIDE_FACTORS.get
+        get_atomic_number = config.ATOMIC_NUMBERS.get
+        no_oxide = (None, None)
+        
+        # Index the lookup table once instead of scanning it for every file
+        lookup_index = build_lookup_index(lookup_table)
+        
+        line = 0
+        for qan_file, qan_data, error in iter_cached_qan_files(qan_files):
+            if error is not None:
+                logger.warning("Error processing QAN file %s: %s", qan_file, error)
+                continue
+            
+            # Find lookup data for this sample
+            lookup_data = get_lookup_data_from_index(lookup_index, qan_data['sample_id'])
+            
+            sample_fields = [lookup_data.get(field, '') for field in LOOKUP_FIELDS]
+            
+            for element_data in qan_data['elements']:
+                element = element_data['element']
+                concentration = element_data['concentration']
+                unit = element_data['unit']
+                
+                # Skip non-concentration units and zero or negative concentrations
+                if unit not in CONCENTRATION_UNITS or concentration <= 0:
+                    continue
+                
+                # Calculate weight percent
+                wt_percent = concentration if unit == '%' else concentration * ppm_to_percent
+                
+                # Determine oxide information
+                oxide_formula, oxide_factor = get_oxide(element, no_oxide)
+                oxide_concentration = wt_percent * oxide_factor if oxide_factor is not None else None
+                
+                line += 1
+                write_row([
+                    line,
+                    *sample_fields,
+                    get_atomic_number(element, 0),
+                    element,
+                    concentration,
+                    unit,
+                    wt_percent,
+                    element_data.get('omnian_scan') or '',
+                    oxide_formula,
+                    oxide_concentration
+                ])
+
+
+def save_tables_to_csv_streaming(
     tables: Dict[str, pd.DataFrame],
-    metadata: Dict[str, Any],
+    csv_path: str,
     lookup_table: List[Dict[str, str]]
-) -> pd.DataFrame:
+) -> None:
     """
-    Create a concatenated DataFrame for CSV export and ternary plotting.
+    Write the concatenated table to CSV one generated table at a time.
+    
+    Produces the same file as save_to_table on the full concatenated
+    DataFrame, while holding only one table's long-format rows in memory.
     
     Args:
         tables: Dictionary of table DataFrames
-        metadata: Project metadata
+        csv_path: Path to save CSV file
+        lookup_table: Sample lookup table
+    """
+    line = 0
+    
+    with open(csv_path, 'w', newline='', buffering=CSV_WRITE_BUFFER_SIZE) as file:
+        # Header first, so an export without rows still has its columns
+        pd.DataFrame(columns=CONCATENATED_COLUMNS).to_csv(file, index=False)
+        
+        for table_columns in _iter_table_columns(tables, lookup_table):
+            row_count = len(table_columns['Element'])
+            chunk = pd.DataFrame({
+                'Line': np.arange(line + 1, line + row_count + 1, dtype=np.int32),
+                **table_columns
+            })
+            line += row_count
+            chunk.to_csv(file, header=False, index=False)
+
+
+def _build_sample_lookup(lookup_table: List[Dict[str, str]]) -> Dict[str, Any]:
+    """
+    Index the lookup table for joining against sample column names.
+    
+    Args:
         lookup_table: Sample lookup table
         
     Returns:
-        Concatenated DataFrame in long format with Element, Sample ID, Wt.% columns
+        Dictionary with the lookup fields as object arrays ('values', each
+        with a trailing blank entry for unmatched columns) and, for report
+        abbreviations ('abbr') and sample IDs ('sid'), an Index of the
+        non-blank keys with the lookup row of each key ('abbr_rows', 'sid_rows')
     """
-    print("Creating concatenated DataFrame for ternary plotting...")
-    
-    # Initialize list to hold all rows
-    all_rows = []
-    
-    # Priority order for table processing (prefer oxide tables for ternary plotting)
-    table_priority = [
-        'relative_major_oxides',
-        'absolute_major_oxides',
-        'relative_trace_oxides', 
-        'absolute_trace_oxides',
-        'relative_major_elements',
-        'absolute_major_elements',
-        'relative_trace_elements',
-        'absolute_trace_elements'
-    ]
+    lookup_df = pd.DataFrame(list(lookup_table), columns=list(LOOKUP_FIELDS), dtype=object).fillna('')
     
-    # Process tables in priority order
-    processed_tables = set()
+    sample_lookup = {
+        'values': {
+            field: np.append(lookup_df[field].to_numpy(dtype=object), '')
+            for field in LOOKUP_FIELDS
+        }
+    }
+    
+    # First row of each non-blank key, like a scan in table order would find
+    for name, field in (('abbr', 'report_abbreviation'), ('sid', 'sample_id')):
+        keys = lookup_df[field]
+        first = (keys != '').to_numpy() & ~keys.duplicated().to_numpy()
+        sample_lookup[name] = pd.Index(keys[first], dtype=object)
+        # A trailing -1 maps "not found" (-1) to the blank entry
+        sample_lookup[name + '_rows'] = np.append(np.flatnonzero(first), -1)
+    
+    return sample_lookup
+
+
+def _lookup_sample_columns(sample_lookup: Dict[str, Any], sample_cols: pd.Index) -> Dict[str, np.ndarray]:
+    """
+    Join sample column names against the lookup table.
+    
+    A column matches the report abbreviation of a lookup row, else its
+    sample ID; unmatched columns use the column name as sample ID and
+    report abbreviation.
+    
+    Args:
+        sample_lookup: Index created by _build_sample_lookup
+        sample_cols: Sample column names of a table
+        
+    Returns:
+        Dictionary of LOOKUP_FIELDS to object arrays, one entry per column
+    """
+    abbr_rows = sample_lookup['abbr_rows'][sample_lookup['abbr'].get_indexer(sample_cols)]
+    sid_rows = sample_lookup['sid_rows'][sample_lookup['sid'].get_indexer(sample_cols)]
+    rows = np.where(abbr_rows >= 0, abbr_rows, sid_rows)
+    found = rows >= 0
+    
+    column_names = np.asarray(sample_cols, dtype=object)
+    sample_info = {}
+    for field in LOOKUP_FIELDS:
+        values = sample_lookup['values'][field][rows]
+        if field in ('sample_id', 'report_abbreviation'):
+            values = np.where(found, values, column_names)
+        sample_info[field] = values
+    return sample_info
+
+
+def _iter_table_columns(
+    tables: Dict[str, pd.DataFrame],
+    lookup_table: List[Dict[str, str]]
+) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Convert generated tables to long-format rows, one table at a time.
     
-    for priority_table in table_priority:
-        if priority_table in tables and priority_table not in processed_tables:
+    Args:
+        tables: Dictionary of table DataFrames
+        lookup_table: Sample lookup table
+        
+    Yields:
+        Dictionaries of equal-length column arrays (all concatenated columns
+        except Line) for each table in priority order that has rows
+    """
+    # Index the lookup table once; sample columns are then joined against it
+    sample_lookup = _build_sample_lookup(lookup_table)
+    
+    # Process tables in priority order
+    for priority_table, is_oxide, is_major in CONCATENATED_TABLE_ORDER:
+        if priority_table in tables:
             df = tables[priority_table]
-            print(f"Processing table: {priority_table}")
-            
-            # Extract table type
-            is_oxide = 'oxide' in priority_table
-            is_absolute = 'absolute' in priority_table
-            is_major = 'major' in priority_table
-            
-            # Skip metadata and lookup tables
-            if priority_table in ['metadata', 'lookup']:
-                continue
+            logger.debug("Processing table: %s", priority_table)
             
             # Skip if no Element column
             if 'Element' not in df.columns:
                 continue
             
             # Get data columns (skip Z and Element columns)
-            data_df = df.iloc[:, 2:]
+            sample_cols = df.columns[2:]
             
-            # Get element/oxide names
-            elements = df['Element'].tolist()
+            # Resolve lookup data for each sample column (the column name is
+            # the report abbreviation, or the sample ID if none was given)
+            sample_info = _lookup_sample_columns(sample_lookup, sample_cols)
             
-            # Iterate through each sample (column)
-            for sample_col in data_df.columns:
-                # Find lookup data for this sample
-                sample_id = sample_col  # The column name is the report abbreviation
-                
-                # Find the full sample data in lookup table
-                lookup_data = None
-                for item in lookup_table:
-                    if item.get('report_abbreviation') == sample_col or item.get('sample_id') == sample_col:
-                        lookup_data = item
-                        break
-                
-                if lookup_data is None:
-                    # Create minimal lookup data
-                    lookup_data = {
-                        'sample_id': sample_col,
-                        'notebook_id': '',
-                        'client_id': '',
-                        'report_abbreviation': sample_col
-                    }
-                
-                # Get concentrations for this sample
-                concentrations = data_df[sample_col].tolist()
-                
-                # Create rows for this sample
-                for i, element in enumerate(elements):
-                    # Skip summary rows like 'Total', 'Balance', 'Trace'
-                    if element in ['Total', 'Balance', 'Trace']:
-                        continue
-                    
-                    # Extract element Z
-                    z = df['Z'].iloc[i] if i < len(df) else 0
-                    
-                    # Get concentration value
-                    concentration = concentrations[i] if i < len(concentrations) else np.nan
-                    
-                    # Skip NaN values and zero/negative values
-                    if pd.isna(concentration) or concentration <= 0:
-                        continue
-                    
-                    # For oxide tables, use the oxide name directly
-                    # For element tables, use the element name
-                    element_name = element
-                    
-                    # Parse element and oxide info for detailed tracking
-                    base_element = element
-                    oxide = None
-                    if is_oxide:
-                        oxide = element
-                        # Try to extract base element if in parentheses format
-                        if '(' in element:
-                            parts = element.split('(')
-                            if len(parts) > 1:
-                                base_element = parts[0].strip()
-                    
-                    # Determine unit and convert to wt%
-                    unit = 'ppm' if not is_major else '%'
-                    
-                    # Calculate weight percent
-                    if unit == '%':
-                        wt_percent = concentration
-                    else:  # ppm
-                        wt_percent = concentration * config.PPM_TO_PERCENT if hasattr(config, 'PPM_TO_PERCENT') else concentration / 10000
-                    
-                    # Calculate oxide concentration if applicable
-                    oxide_concentration = None
-                    if is_oxide:
-                        oxide_concentration = concentration
-                    elif hasattr(config, 'OXIDE_FACTORS') and base_element in config.OXIDE_FACTORS:
-                        # Convert element to oxide concentration
-                        oxide_formula, oxide_factor = config.OXIDE_FACTORS[base_element]
-                        oxide_concentration = wt_percent * oxide_factor
-                        oxide = oxide_formula
-                    
-                    # Create row - use element_name as the Element for ternary plotting
-                    row = {
-                        'Line': len(all_rows) + 1,
-                        'Sample ID': lookup_data.get('sample_id', ''),
-                        'Notebook ID': lookup_data.get('notebook_id', ''),
-                        'Client ID': lookup_data.get('client_id', ''),
-                        'Report Abbreviation': lookup_data.get('report_abbreviation', ''),
-                        'Z': z,
-                        'Element': element_name,  # This is what ternary plotting will use
-                        'Concentration': concentration,
-                        'Unit': unit,
-                        'Wt.%': wt_percent,
-                        'Omnian': '',  # Not available in processed data
-                        'Oxide': oxide,
-                        'OxideConc.wt%': oxide_concentration
-                    }
-                    
-                    all_rows.append(row)
+            # One float mask over the whole sample block: keep finite, positive
+            # values outside the summary rows
+            values = df.iloc[:, 2:].to_numpy(dtype=np.float64, na_value=np.nan)
+            element_rows = ~df['Element'].isin(SUMMARY_ROWS).to_numpy()
+            keep = np.isfinite(values) & (values > 0) & element_rows[:, np.newaxis]
             
-            processed_tables.add(priority_table)
-    
-    # Process any remaining tables not in priority list
-    for table_name, df in tables.items():
-        if table_name not in processed_tables and table_name not in ['metadata', 'lookup']:
-            print(f"Processing remaining table: {table_name}")
-            # Use the same logic as above for remaining tables
-            # (This is a simplified version for any edge cases)
+            # Gather the kept cells sample by sample (column-major order)
+            sample_index, row_index = np.nonzero(keep.T)
+            concentration = values[row_index, sample_index]
+            elements = pd.Series(df['Element'].to_numpy()[row_index], dtype=object)
+            # Summary rows (blank Z) are already masked out, so Z fits int16
+            z_values = df['Z'].to_numpy()[row_index].astype(np.int16)
             
-    print(f"Created concatenated DataFrame with {len(all_rows)} rows")
-    
-    # Create DataFrame
-    if all_rows:
-        result_df = pd.DataFrame(all_rows)
-        print(f"DataFrame columns: {result_df.columns.tolist()}")
-        print(f"Unique elements: {sorted(result_df['Element'].unique())}")
-        print(f"Unique samples: {sorted(result_df['Sample ID'].unique())}")
-        return result_df
-    else:
-        # Return empty DataFrame with correct columns
-        return pd.DataFrame(columns=[
-            'Line', 'Sample ID', 'Notebook ID', 'Client ID', 'Report Abbreviation',
-            'Z', 'Element', 'Concentration', 'Unit', 'Wt.%', 'Omnian', 'Oxide', 'OxideConc.wt%'
-        ])
+            # Determine unit and convert to wt%
+            unit = '%' if is_major else 'ppm'
+            wt_percent = concentration if is_major else concentration * config.PPM_TO_PERCENT
+            
+            # For oxide tables the Element already is the oxide; otherwise
+            # convert element to oxide concentration where a factor exists
+            if is_oxide:
+                oxide = elements.to_numpy()
+                oxide_concentration = concentration
+            else:
+                oxide, oxide_factor = oxide_form_arrays(elements)
+                oxide_concentration = wt_percent * oxide_factor
+            
+            row_count = len(concentration)
+            table_columns = {
+                'Sample ID': sample_info['sample_id'][sample_index],
+                'Notebook ID': sample_info['notebook_id'][sample_index],
+                'Client ID': sample_info['client_id'][sample_index],
+                'Report Abbreviation': sample_info['report_abbreviation'][sample_index],
+                'Z': z_values,
+                'Element': elements.to_numpy(),  # This is what ternary plotting will use
+                'Concentration': concentration,
+                'Unit': np.full(row_count, unit, dtype=object),
+                'Wt.%': wt_percent,
+                'Omnian': np.full(row_count, '', dtype=object),  # Not available in processed data
+                'Oxide': oxide,
+                'OxideConc.wt%': oxide_concentration
+            }
+            if row_count:
+                yield table_columns
+
+
+def create_concatenated_dataframe(
+    tables: Dict[str, pd.DataFrame],
+    metadata: Dict[str, Any],
+    lookup_table: List[Dict[str, str]]
+) -> pd.DataFrame:
+    """
+    Create a concatenated DataFrame for CSV export and ternary plotting.
+    
+    Args:
+        tables: Dictionary of table DataFrames
+        metadata: Project metadata
+        lookup_table: Sample lookup table
+        
+    Returns:
+        Concatenated DataFrame in long format with Element, Sample ID, Wt.% columns
+    """
+    logger.debug("Creating concatenated DataFrame for ternary plotting...")
+    
+    # Collect every output column as a list of per-table arrays so the
+    # DataFrame is built once at the end instead of concatenating frames
+    pieces = {column: [] for column in CONCATENATED_COLUMNS[1:]}
+    for table_columns in _iter_table_columns(tables, lookup_table):
+        for column, column_values in table_columns.items():
+            pieces[column].append(column_values)
+    
+    result_df = _build_concatenated_frame(pieces)
+    logger.debug("Created concatenated DataFrame with %d rows", len(result_df))
+    
+    # Only sort the unique values when someone will read them
+    if not result_df.empty and logger.isEnabledFor(logging.DEBUG):
+        logger.debug("DataFrame columns: %s", result_df.columns.tolist())
+        logger.debug("Unique elements: %s", sorted(result_df['Element'].unique()))
+        logger.debug("Unique samples: %s", sorted(result_df['Sample ID'].unique()))
+    return result_df
 
 
 def create_concatenated_dataframe_from_qan(
@@ -253,89 +439,107 @@ def create_concatenated_dataframe_from_qan(
     Returns:
         Concatenated DataFrame with all fields populated
     """
-    # Initialize list to hold all rows
-    all_rows = []
+    # Collect the raw fields of every kept element row column by column
+    # (structure of arrays) and build a single DataFrame at the end
+    sample_fields = []  # Lookup fields of each sample, in LOOKUP_FIELDS order
+    sample_index = []  # Row -> position in sample_fields
+    elements = []
+    concentrations = []
+    units = []
+    omnian_scans = []
+    
+    # Bind the column appends once, outside the element loop
+    add_sample_index = sample_index.append
+    add_element = elements.append
+    add_concentration = concentrations.append
+    add_unit = units.append
+    add_omnian_scan = omnian_scans.append
+    
+    # Index the lookup table once instead of scanning it for every file
+    lookup_index = build_lookup_index(lookup_table)
     
     # Process each QAN file
-    for qan_file in qan_files:
+    for qan_file, qan_data, error in iter_cached_qan_files(qan_files):
+        if error is not None:
+            logger.warning("Error processing QAN file %s: %s", qan_file, error)
+            continue
+        
         try:
-            # Read QAN file
-            qan_data = read_qan_file(qan_file)
             sample_id = qan_data['sample_id']
             
-            # Find lookup data for this sample
-            lookup_data = get_lookup_data_by_sample_id(lookup_table, sample_id)
-            if lookup_data is None:
-                # Create minimal lookup data
-                lookup_data = {
-                    'sample_id': sample_id,
-                    'notebook_id': '',
-                    'client_id': '',
-                    'report_abbreviation': sample_id
-                }
+            # Find lookup data for this sample (a blank row if not found)
+            lookup_data = get_lookup_data_from_index(lookup_index, sample_id)
+            sample_number = len(sample_fields)
+            sample_fields.append([lookup_data.get(field, '') for field in LOOKUP_FIELDS])
             
-            # Process each element in the QAN file
             for element_data in qan_data['elements']:
-                element = element_data['element']
                 concentration = element_data['concentration']
                 unit = element_data['unit']
-                omnian_scan = element_data.get('omnian_scan', '')
                 
-                # Skip non-concentration units
-                if unit not in ['%', 'ppm']:
+                # Skip non-concentration units and zero or negative concentrations
+                if unit not in CONCENTRATION_UNITS or concentration <= 0:
                     continue
                 
-                # Skip zero or negative concentrations
-                if concentration <= 0:
-                    continue
-                
-                # Get atomic number
-                z = config.ATOMIC_NUMBERS.get(element, 0)
-                
-                # Calculate weight percent
-                if unit == '%':
-                    wt_percent = concentration
-                else:  # ppm
-                    wt_percent = concentration * config.PPM_TO_PERCENT
-                
-                # Determine oxide information
-                oxide_formula = None
-                oxide_concentration = None
-                
-                if element in config.OXIDE_FACTORS:
-                    oxide_formula, oxide_factor = config.OXIDE_FACTORS[element]
-                    # Calculate oxide concentration in wt%
-                    oxide_concentration = wt_percent * oxide_factor
-                
-                # Create row with all required fields
-                row = {
-                    'Line': len(all_rows) + 1,
-                    'Sample ID': lookup_data.get('sample_id', ''),
-                    'Notebook ID': lookup_data.get('notebook_id', ''),
-                    'Client ID': lookup_data.get('client_id', ''),
-                    'Report Abbreviation': lookup_data.get('report_abbreviation', ''),
-                    'Z': z,
-                    'Element': element,
-                    'Concentration': concentration,
-                    'Unit': unit,
-                    'Wt.%': wt_percent,
-                    'Omnian': omnian_scan,
-                    'Oxide': oxide_formula,
-                    'OxideConc.wt%': oxide_concentration
-                }
-                
-                all_rows.append(row)
+                # Read every field before appending so the columns stay aligned
+                element = element_data['element']
+                omnian_scan = element_data.get('omnian_scan') or ''
                 
+                add_sample_index(sample_number)
+                add_element(element)
+                add_concentration(concentration)
+                add_unit(unit)
+                add_omnian_scan(omnian_scan)
+        
         except Exception as e:
-            print(f"Error processing QAN file {qan_file}: {str(e)}")
+            logger.warning("Error processing QAN file %s: %s", qan_file, e)
             continue
     
-    # Create DataFrame
-    if all_rows:
-        return pd.DataFrame(all_rows)
-    else:
+    if not elements:
         # Return empty DataFrame with correct columns
-        return pd.DataFrame(columns=[
-            'Line', 'Sample ID', 'Notebook ID', 'Client ID', 'Report Abbreviation',
-            'Z', 'Element', 'Concentration', 'Unit', 'Wt.%', 'Omnian', 'Oxide', 'OxideConc.wt%'
-        ])
+        return pd.DataFrame(columns=CONCATENATED_COLUMNS)
+    
+    # Derive the calculated columns once over the whole table
+    lookup_columns = np.array(sample_fields, dtype=object)[np.array(sample_index, dtype=np.intp)]
+    element = pd.Series(elements, dtype=object)
+    unit = np.array(units, dtype=object)
+    concentration = np.array(concentrations, dtype=np.float64)
+    wt_percent = np.where(unit == '%', concentration, concentration * config.PPM_TO_PERCENT)
+    oxide, oxide_factor = oxide_form_arrays(element)
+    
+    return pd.DataFrame({
+        'Line': np.arange(1, len(concentration) + 1, dtype=np.int32),
+        'Sample ID': lookup_columns[:, 0],
+        'Notebook ID': lookup_columns[:, 1],
+        'Client ID': lookup_columns[:, 2],
+        'Report Abbreviation': lookup_columns[:, 3],
+        'Z': element.map(config.ATOMIC_NUMBERS_SERIES).fillna(0).astype('int16').to_numpy(),
+        'Element': element.to_numpy(),
+        'Concentration': concentration,
+        'Unit': unit,
+        'Wt.%': wt_percent,
+        'Omnian': np.array(omnian_scans, dtype=object),
+        'Oxide': oxide,
+        'OxideConc.wt%': wt_percent * oxide_factor
+    })
+
+
+def _build_concatenated_frame(pieces: Dict[str, List[np.ndarray]]) -> pd.DataFrame:
+    """
+    Build the concatenated DataFrame from per-table column arrays.
+    
+    Args:
+        pieces: Mapping of each column except Line to its per-table arrays
+        
+    Returns:
+        DataFrame with CONCATENATED_COLUMNS, or an empty one with those columns
+    """
+    if not pieces['Element']:
+        # Return empty DataFrame with correct columns
+        return pd.DataFrame(columns=CONCATENATED_COLUMNS)
+    
+    columns = {column: np.concatenate(arrays) for column, arrays in pieces.items()}
+    row_count = len(columns['Element'])
+    return pd.DataFrame({
+        'Line': np.arange(1, row_count + 1, dtype=np.int32),
+        **columns
+    })
@@ -3,25 +3,53 @@ Data processor controller for XRF Data Manager.
 Handles processing of XRF data files and generating tables.
 """
 
-import os
-import sys
-import json
-from typing import Dict, Any, List
+import re
+from typing import Dict, Any, List, FrozenSet
 
 import pandas as pd
 import numpy as np
 
-# Add parent directory to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
-from src.models.qan_parser import read_qan_file
+# The application runs from the repository root, so the src package and the
+# top-level config module are importable without editing sys.path
+from src.models.parse_cache import iter_cached_qan_files
 from src.models.element_data import (
-    classify_element, convert_to_oxide, normalize_concentrations,
-    calculate_balance, convert_to_weight_percent, get_element_atomic_number
+    CONCENTRATION_UNITS, build_element_frame, classify_trace_array, convert_to_oxide_frame,
+    normalize_concentration_array, calculate_balance, convert_to_weight_percent
 )
-from src.models.lookup_table import get_lookup_data_by_sample_id
+from src.models.lookup_table import build_lookup_index, get_lookup_data_from_index
+from src.models.project_data import load_app_config
 import config
 
+# Name up to any parenthesized description, e.g. "Fe2O3 (Iron III Oxide)" -> "Fe2O3"
+BASE_NAME_RE = re.compile(r'^\s*([^(]*?)\s*(?:\(|$)')
+
+# Leading element symbol of a formula, e.g. "Al2O3" -> "Al"
+ELEMENT_SYMBOL_RE = re.compile(r'^([A-Z][a-z]?)')
+
+# Formula markers that identify an oxide rather than a bare element symbol
+OXIDE_MARKER_RE = re.compile(r'[234O]')
+
+# Anything that is not a letter
+NON_ALPHA_RE = re.compile(r'[\W\d_]+')
+
+
+def get_tube_elements(instrument: str) -> FrozenSet[str]:
+    """
+    Get the X-ray tube elements of an instrument.
+    
+    Args:
+        instrument: Instrument name as listed in config.json
+        
+    Returns:
+        Set of tube element symbols (empty if unknown or unreadable)
+    """
+    try:
+        # Parsed once per version of config.json and shared with the wizard pages
+        instruments = load_app_config().get('instruments', {})
+        return frozenset(instruments.get(instrument, {}).get('tube_elements', []))
+    except Exception:
+        return frozenset()
+
 
 def process_data(
     xrf_folder: str,
@@ -47,37 +75,31 @@ def process_data(
     tables = {}
     
     # Get tube elements to ignore
-    tube_elements = []
+    tube_elements = frozenset()
     if options.get('ignore_tube_elements', True):
         instrument = metadata.get('instrument', '')
         if instrument:
-            try:
-                config_path = os.path.join(
-                    os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-                    'data', 'config.json'
-                )
-                
-                with open(config_path, 'r') as file:
-                    config_data = json.load(file)
-                    
-                    if instrument in config_data.get('instruments', {}):
-                        tube_elements = config_data['instruments'][instrument].get('tube_elements', [])
-            except Exception:
-                pass
+            tube_elements = get_tube_elements(instrument)
     
     # Read all QAN files
     all_samples_data = []
     
-    for qan_file in qan_files:
+    # Index the lookup table once instead of scanning it for every file
+    lookup_index = build_lookup_index(lookup_table)
+    
+    # Files are parsed in order, across worker processes for large batches;
+    # unchanged files come from the per-user parse cache
+    for qan_file, qan_data, error in iter_cached_qan_files(qan_files):
+        if error is not None:
+            print(f"Error processing {qan_file}: {str(error)}")
+            continue
+        
         try:
-            # Read QAN file
-            qan_data = read_qan_file(qan_file)
-            
             # Get sample ID
             sample_id = qan_data['sample_id']
             
             # Get lookup data
-            lookup_data = get_lookup_data_by_sample_id(lookup_table, sample_id)
+            lookup_data = get_lookup_data_from_index(lookup_index, sample_id)
             
             # Process elements
             elements_data = qan_data['elements']
@@ -98,10 +120,18 @@ def process_data(
     
     # Generate tables based on options with error handling
     try:
+        # Flatten, classify and look up oxide forms of all samples once for
+        # every table variant
+        sample_rows = _flatten_samples(all_samples_data, tube_elements)
+        
         # Parse decimal places
         major_decimal = float(options.get('major_decimal_places', '0.01'))
         trace_decimal = float(options.get('trace_decimal_places', '10'))
         
+        # Convert them to rounding digits once for all tables
+        major_digits = _rounding_digits('major', major_decimal)
+        trace_digits = _rounding_digits('trace', trace_decimal)
+        
         # We need to generate trace tables first to calculate the trace sum for major tables
         trace_tables = {}
         
@@ -111,7 +141,8 @@ def process_data(
                 all_samples_data, 'absolute', 'trace', 
                 report_as_oxides=False,
                 ignore_elements=tube_elements,
-                decimal_places=trace_decimal
+                sample_rows=sample_rows,
+                round_digits=trace_digits
             )
         
         if options.get('generate_relative', False) and options.get('generate_trace', False):
@@ -119,7 +150,8 @@ def process_data(
                 all_samples_data, 'relative', 'trace', 
                 report_as_oxides=False,
                 ignore_elements=tube_elements,
-                decimal_places=trace_decimal
+                sample_rows=sample_rows,
+                round_digits=trace_digits
             )
             
         # Add trace tables to main tables
@@ -129,36 +161,30 @@ def process_data(
         if options.get('generate_absolute', False) and options.get('generate_major', False):
             trace_sum = None
             if 'absolute_trace_elements' in trace_tables:
-                # Calculate sum of trace elements in wt%
-                trace_df = trace_tables['absolute_trace_elements']
-                # Get only concentration columns (skip Z and Element columns)
-                trace_conc_cols = trace_df.columns[2:]
-                # Sum and convert from ppm to wt%
-                trace_sum = trace_df[trace_conc_cols].sum() / 10000  # ppm to wt%
+                # Calculate sum of trace elements in wt% from the unrounded rows
+                trace_sum = _trace_sum(all_samples_data, sample_rows, 'absolute')
                 
             tables['absolute_major_elements'] = generate_concentration_table(
                 all_samples_data, 'absolute', 'major', 
                 report_as_oxides=False,
                 ignore_elements=tube_elements,
-                decimal_places=major_decimal,
+                sample_rows=sample_rows,
+                round_digits=major_digits,
                 trace_sum=trace_sum
             )
         
         if options.get('generate_relative', False) and options.get('generate_major', False):
             trace_sum = None
             if 'relative_trace_elements' in trace_tables:
-                # Calculate sum of trace elements in wt%
-                trace_df = trace_tables['relative_trace_elements']
-                # Get only concentration columns (skip Z and Element columns)
-                trace_conc_cols = trace_df.columns[2:]
-                # Sum and convert from ppm to wt%
-                trace_sum = trace_df[trace_conc_cols].sum() / 10000  # ppm to wt%
+                # Calculate sum of trace elements in wt% from the unrounded rows
+                trace_sum = _trace_sum(all_samples_data, sample_rows, 'relative')
                 
             tables['relative_major_elements'] = generate_concentration_table(
                 all_samples_data, 'relative', 'major', 
                 report_as_oxides=False,
                 ignore_elements=tube_elements,
-                decimal_places=major_decimal,
+                sample_rows=sample_rows,
+                round_digits=major_digits,
                 trace_sum=trace_sum
             )
         
@@ -169,7 +195,8 @@ def process_data(
                     all_samples_data, 'absolute', 'major', 
                     report_as_oxides=True,
                     ignore_elements=tube_elements,
-                    decimal_places=major_decimal
+                    sample_rows=sample_rows,
+                    round_digits=major_digits
                 )
             
             if options.get('generate_absolute', False) and options.get('generate_trace', False):
@@ -177,7 +204,8 @@ def process_data(
                     all_samples_data, 'absolute', 'trace', 
                     report_as_oxides=True,
                     ignore_elements=tube_elements,
-                    decimal_places=trace_decimal
+                    sample_rows=sample_rows,
+                    round_digits=trace_digits
                 )
             
             if options.get('generate_relative', False) and options.get('generate_major', False):
@@ -185,7 +213,8 @@ def process_data(
                     all_samples_data, 'relative', 'major', 
                     report_as_oxides=True,
                     ignore_elements=tube_elements,
-                    decimal_places=major_decimal
+                    sample_rows=sample_rows,
+                    round_digits=major_digits
                 )
             
             if options.get('generate_relative', False) and options.get('generate_trace', False):
@@ -193,7 +222,8 @@ def process_data(
                     all_samples_data, 'relative', 'trace', 
                     report_as_oxides=True,
                     ignore_elements=tube_elements,
-                    decimal_places=trace_decimal
+                    sample_rows=sample_rows,
+                    round_digits=trace_digits
                 )
         
         # Add metadata table
@@ -214,6 +244,126 @@ def process_data(
     return tables
 
 
+def _rounding_digits(element_type: str, decimal_places: float = None) -> int:
+    """
+    Convert a rounding step to the digits argument of DataFrame.round.
+    
+    Args:
+        element_type: 'major' or 'trace'
+        decimal_places: Rounding step (e.g. 0.01 for major, 10 for trace)
+        
+    Returns:
+        Number of decimal places, negative to round to tens
+    """
+    if element_type == 'major':
+        # Default is 0.01 (2 decimal places)
+        return 2 if decimal_places is None else abs(int(np.log10(decimal_places)))
+    
+    if decimal_places is None or decimal_places == 10:
+        # Default is 10 (round to nearest 10)
+        return -1
+    
+    # Round to nearest 1
+    return 0
+
+
+def _sample_columns(all_samples_data: List[Dict[str, Any]]) -> List[str]:
+    """
+    Get the table column names of the samples.
+    
+    Args:
+        all_samples_data: List of sample data dictionaries
+        
+    Returns:
+        The report abbreviation of each sample, or its sample ID if none
+    """
+    return [
+        sample_data['report_abbreviation'] or sample_data['sample_id']
+        for sample_data in all_samples_data
+    ]
+
+
+def _trace_sum(
+    all_samples_data: List[Dict[str, Any]],
+    sample_rows: Dict[str, np.ndarray],
+    concentration_type: str
+) -> pd.Series:
+    """
+    Sum the unrounded trace concentrations of every sample in wt%.
+    
+    Args:
+        all_samples_data: List of sample data dictionaries
+        sample_rows: Rows from _flatten_samples
+        concentration_type: 'absolute' or 'relative'
+        
+    Returns:
+        Series with one wt% sum per sample column
+    """
+    sample_count = len(all_samples_data)
+    sample_index = sample_rows['sample_index']
+    units = sample_rows['unit']
+    values = sample_rows['concentration']
+    if concentration_type == 'relative':
+        values = normalize_concentration_array(sample_index, units, values, sample_count)
+    
+    is_trace = sample_rows['is_trace']
+    trace_percent = np.where(units == 'ppm', values * config.PPM_TO_PERCENT, values)[is_trace]
+    sums = np.bincount(sample_index[is_trace], weights=trace_percent, minlength=sample_count)
+    return pd.Series(sums, index=_sample_columns(all_samples_data))
+
+
+def _flatten_samples(
+    all_samples_data: List[Dict[str, Any]],
+    ignore_elements: FrozenSet[str]
+) -> Dict[str, np.ndarray]:
+    """
+    Flatten the concentration rows of all samples into parallel arrays.
+    
+    Ignored elements and non-concentration units (e.g. kcps) are skipped.
+    The rows are classified and their oxide forms looked up here, once for
+    all the table variants built from them.
+    
+    Args:
+        all_samples_data: List of sample data dictionaries
+        ignore_elements: Elements to ignore
+        
+    Returns:
+        Dictionary of equal-length arrays: 'sample_index', 'element', 'unit',
+        'concentration', 'is_trace', 'oxide' and 'oxide_factor' (NaN for
+        elements without an oxide form)
+    """
+    element_frame = build_element_frame([
+        element_data
+        for sample_data in all_samples_data
+        for element_data in sample_data['elements']
+    ])
+    
+    # Label every row with the number of its sample
+    row_counts = [len(sample_data['elements']) for sample_data in all_samples_data]
+    sample_index = np.repeat(np.arange(len(all_samples_data), dtype=np.intp), row_counts)
+    
+    # Skip ignored elements and non-concentration units
+    keep = (
+        element_frame['unit'].isin(CONCENTRATION_UNITS) &
+        ~element_frame['element'].isin(ignore_elements)
+    ).to_numpy()
+    element_frame = element_frame[keep]
+    
+    units = element_frame['unit'].to_numpy()
+    concentrations = element_frame['concentration'].to_numpy()
+    oxide_frame = convert_to_oxide_frame(element_frame)
+    
+    return {
+        'sample_index': sample_index[keep],
+        'element': element_frame['element'].to_numpy(),
+        'unit': units,
+        'concentration': concentrations,
+        'is_trace': classify_trace_array(units, concentrations),
+        'oxide': oxide_frame['oxide'].to_numpy(),
+        'oxide_factor': oxide_frame['oxide_factor'].to_numpy(dtype=np.float64, na_value=np.nan)
+    }
+
+
 def generate_concentration_table(
     all_samples_data: List[Dict[str, Any]],
     concentration_type: str,
@@ -221,7 +371,9 @@ def generate_concentration_table(
     report_as_oxides: bool = False,
     ignore_elements: List[str] = None,
     decimal_places: float = None,
-    trace_sum: pd.Series = None
+    trace_sum: pd.Series = None,
+    sample_rows: Dict[str, np.ndarray] = None,
+    round_digits: int = None
 ) -> pd.DataFrame:
     """
     Generate a concentration table for a specific type.
@@ -232,160 +384,81 @@ def generate_concentration_table(
         element_type: 'major' or 'trace'
         report_as_oxides: Whether to report as oxides
         ignore_elements: List of elements to ignore
+        decimal_places: Rounding step (e.g. 0.01 for major, 10 for trace)
+        trace_sum: Trace sum in wt% per sample, for major table summary rows
+        sample_rows: Rows from _flatten_samples, to share between tables
+            (ignore_elements must already be applied)
+        round_digits: Digits to round to, as from _rounding_digits
+            (overrides decimal_places)
         
     Returns:
         DataFrame with the concentration table
     """
-    if ignore_elements is None:
-        ignore_elements = []
-    
-    # First, collect all sample IDs and all unique elements
-    sample_columns = []  # List of sample column names
-    all_unique_elements = set()  # Set of all unique element symbols
-    
-    # First pass: collect all unique elements and sample IDs
-    for sample_index, sample_data in enumerate(all_samples_data):
-        sample_id = sample_data['sample_id']
-        report_abbr = sample_data['report_abbreviation'] or sample_id
-        sample_columns.append(report_abbr)
-        
-        # Process elements to find all unique elements
-        for element_data in sample_data['elements']:
-            element = element_data['element']
-            
-            # Skip ignored elements
-            if element in ignore_elements:
-                continue
-            
-            # Skip non-concentration units
-            if element_data['unit'] not in ['%', 'ppm']:
-                continue
-            
-            # Classify element
-            element_class = classify_element(element_data)
-            
-            # Add if matches the requested type
-            if element_type == element_class:
-                # Handle oxide conversion if needed
-                if report_as_oxides:
-                    oxide_data = convert_to_oxide(element_data)
-                    if oxide_data['oxide'] and oxide_data['oxide_concentration'] is not None:
-                        all_unique_elements.add(oxide_data['oxide'])
-                else:
-                    all_unique_elements.add(element)
-    
-    # Now we know all elements and samples, create the data structure
-    concentration_data = {}
-    for element in all_unique_elements:
-        # Initialize with NaN for all samples
-        concentration_data[element] = [np.nan] * len(sample_columns)
-    
-    # Second pass: fill in the concentration values
-    for sample_index, sample_data in enumerate(all_samples_data):
-        # Filter elements by type and exclude ignored elements
-        elements_data = []
-        for element_data in sample_data['elements']:
-            element = element_data['element']
-            
-            # Skip ignored elements
-            if element in ignore_elements:
-                continue
-            
-            # Skip non-concentration units
-            if element_data['unit'] not in ['%', 'ppm']:
-                continue
-            
-            # Classify element
-            element_class = classify_element(element_data)
-            
-            # Add if matches the requested type
-            if element_type == element_class:
-                elements_data.append(element_data)
-        
-        # For relative concentration, we need all elements (both major and trace)
-        if concentration_type == 'relative':
-            # Get all elements (for cross-type normalization)
-            all_sample_elements = []
-            for elem_data in sample_data['elements']:
-                if (elem_data['element'] not in ignore_elements and 
-                    elem_data['unit'] in ['%', 'ppm']):
-                    all_sample_elements.append(elem_data)
-                    
-            # Normalize using all elements, but only apply to this element type
-            elements_data = normalize_concentrations(elements_data, all_sample_elements, ignore_elements)
-        
-        # Process elements
-        for element_data in elements_data:
-            element = element_data['element']
-            
-            # Get concentration value
-            if concentration_type == 'relative':
-                # Use normalized concentration
-                if element_data['unit'] == 'ppm':
-                    concentration = element_data.get('normalized_concentration_original', element_data['concentration'])
-                else:
-                    concentration = element_data.get('normalized_concentration', element_data['concentration'])
-            else:
-                # Use original concentration
-                concentration = element_data['concentration']
-            
-            # Convert to oxide if requested
-            if report_as_oxides:
-                oxide_data = convert_to_oxide(element_data)
-                if oxide_data['oxide'] and oxide_data['oxide_concentration'] is not None:
-                    element = oxide_data['oxide']
-                    concentration = oxide_data['oxide_concentration']
-            
-            # Set the concentration value at the correct sample index
-            if element in concentration_data:
-                concentration_data[element][sample_index] = concentration
+    # Use a set so the per-element ignore checks are hash lookups
+    ignore_elements = frozenset(ignore_elements or ())
     
-    # Create DataFrame
-    df = pd.DataFrame(concentration_data, index=sample_columns).T
+    sample_count = len(all_samples_data)
     
-    # Round values based on specified decimal places or defaults
-    if element_type == 'major':
-        # Default is 0.01 (2 decimal places)
-        decimal_points = 2 if decimal_places is None else abs(int(np.log10(decimal_places)))
-        df = df.round(decimal_points)
+    # Sample column names: the report abbreviation, or the sample ID if none
+    sample_columns = _sample_columns(all_samples_data)
+    
+    # Flatten the concentration rows of all samples into parallel arrays,
+    # unless the caller already did so for several tables
+    if sample_rows is None:
+        sample_rows = _flatten_samples(all_samples_data, ignore_elements)
+    sample_index = sample_rows['sample_index']
+    concentrations = sample_rows['concentration']
+    
+    # Relative concentrations are normalized over all elements (both major
+    # and trace) of a sample before selecting the requested type
+    if concentration_type == 'relative':
+        values = normalize_concentration_array(sample_index, sample_rows['unit'], concentrations, sample_count)
     else:
-        # Default is 10 (round to nearest 10)
-        if decimal_places is None or decimal_places == 10:
-            df = df.round(-1)  # Round to nearest 10
-        else:
-            df = df.round(0)  # Round to nearest 1
+        values = concentrations
     
-    # Add Z column for sorting
-    z_values = []
-    elements = []
+    # Keep the rows of the requested type
+    selected = sample_rows['is_trace'] if element_type == 'trace' else ~sample_rows['is_trace']
     
-    for element in df.index:
-        # Extract base element (before oxide conversion)
-        if '(' in element:  # Handle formulas like "Fe2O3 (Iron III Oxide)"
-            base_element = element.split('(')[0].strip()
-        else:
-            base_element = element
-            
-        # For oxides (e.g., Al2O3), extract the primary element (Al)
-        if any(x in base_element for x in ['2', '3', '4', 'O']):
-            # Extract the element symbol at the beginning of the formula
-            import re
-            element_match = re.match(r'([A-Z][a-z]?)', base_element)
-            if element_match:
-                base_element = element_match.group(1)
-        
-        # Remove any remaining non-alphabetic characters
-        base_element = ''.join(c for c in base_element if c.isalpha())
-        
-        z = get_element_atomic_number(base_element)
-        
-        z_values.append(z)
-        elements.append(element)
+    # Convert to oxides if requested; the oxide concentration is based on the
+    # measured concentration and elements without an oxide form are left out
+    if report_as_oxides:
+        oxide_factor = sample_rows['oxide_factor']
+        selected = selected & ~np.isnan(oxide_factor)
+        elements = sample_rows['oxide'][selected]
+        values = concentrations[selected] * oxide_factor[selected]
+    else:
+        elements = sample_rows['element'][selected]
+        values = values[selected]
+    sample_index = sample_index[selected]
+    
+    # Rows in order of first appearance, then one scatter of all values
+    # into an elements x samples array (NaN where a sample lacks the element)
+    element_index, row_names = pd.factorize(elements)
+    table_values = np.full((len(row_names), sample_count), np.nan)
+    table_values[element_index, sample_index] = values
+    
+    # Create DataFrame
+    df = pd.DataFrame(table_values, index=pd.Index(row_names, dtype=object), columns=sample_columns)
+    
+    # Add Z column for sorting, resolving all rows at once
+    # Extract base names (before oxide conversion); handles formulas like
+    # "Fe2O3 (Iron III Oxide)"
+    base_names = pd.Series(df.index, dtype=object).str.extract(BASE_NAME_RE, expand=False)
+    
+    # For oxides (e.g., Al2O3), use the element symbol at the beginning of the formula (Al)
+    symbols = base_names.str.extract(ELEMENT_SYMBOL_RE, expand=False)
+    is_oxide = base_names.str.contains(OXIDE_MARKER_RE) & symbols.notna()
+    base_names = symbols.where(is_oxide, base_names)
+    
+    # Remove any remaining non-alphabetic characters
+    base_names = base_names.str.replace(NON_ALPHA_RE, '', regex=True)
+    
+    z_values = base_names.map(config.ATOMIC_NUMBERS_SERIES).fillna(0).astype('int64')
     
     # Create a properly structured DataFrame with Z values
     df_z = pd.DataFrame({
-        'Z': z_values,
-        'Element': elements
+        'Z': z_values.to_numpy(),
+        'Element': df.index.to_numpy(dtype=object)
     }, index=df.index)
     
     # Join with the concentration data
@@ -394,97 +467,67 @@ def generate_concentration_table(
     # Sort by Z
     df_with_z = df_with_z.sort_values('Z')
     
+    # Get the columns that contain concentration data (everything except Z and Element)
+    concentration_cols = df_with_z.columns[2:]
+    
+    # Collect the summary rows (blank Z value) and append them in one concat
+    summary_rows = []
+    
     # Calculate summary rows for absolute concentration
     if concentration_type == 'absolute' and element_type == 'major':
-        # Get the columns that contain concentration data (everything except Z and Element)
-        concentration_cols = df_with_z.columns[2:]
-        
         # Calculate total of existing major elements
         major_sum = df_with_z[concentration_cols].sum()
         
         # Add trace row if trace_sum is provided
         if trace_sum is not None:
-            # Create trace row with proper indices
-            trace_row = pd.Series(['', 'Trace'], index=['Z', 'Element'])
-            trace_row = pd.concat([trace_row, trace_sum])
-            
-            # Add trace row to DataFrame
-            df_with_z = pd.concat([df_with_z, pd.DataFrame([trace_row], index=['Trace'])])
-            
-            # Recalculate the total with trace included
-            total_with_trace = major_sum + trace_sum
-            
-            # Create balance row (100 - total_with_trace)
-            balance_values = 100 - total_with_trace
-            balance_row = pd.Series(['', 'Balance'], index=['Z', 'Element'])
-            balance_row = pd.concat([balance_row, balance_values])
-            
-            # Create total row
-            total_row = pd.Series(['', 'Total'], index=['Z', 'Element'])
-            total_row = pd.concat([total_row, pd.Series([100] * len(concentration_cols), index=concentration_cols)])
+            summary_rows.append(('Trace', trace_sum))
             
-            # Add rows to DataFrame
-            df_with_z = pd.concat([df_with_z, pd.DataFrame([balance_row, total_row], index=['Balance', 'Total'])])
+            # Create balance row (100 - total with trace included)
+            summary_rows.append(('Balance', 100 - (major_sum + trace_sum)))
         else:
             # Create balance row without trace included
-            balance_values = 100 - major_sum
-            balance_row = pd.Series(['', 'Balance'], index=['Z', 'Element'])
-            balance_row = pd.concat([balance_row, balance_values])
-            
-            # Create total row
-            total_row = pd.Series(['', 'Total'], index=['Z', 'Element'])
-            total_row = pd.concat([total_row, pd.Series([100] * len(concentration_cols), index=concentration_cols)])
-            
-            # Add rows to DataFrame
-            df_with_z = pd.concat([df_with_z, pd.DataFrame([balance_row, total_row], index=['Balance', 'Total'])])
+            summary_rows.append(('Balance', 100 - major_sum))
+        
+        # Create total row
+        summary_rows.append(('Total', pd.Series(100, index=concentration_cols)))
     
     # For relative concentration major tables
     elif concentration_type == 'relative' and element_type == 'major':
-        # Get the columns that contain concentration data
-        concentration_cols = df_with_z.columns[2:]
-        
         # Calculate total of existing major elements
         major_sum = df_with_z[concentration_cols].sum()
         
         # Add trace row if trace_sum is provided
         if trace_sum is not None:
-            # Create trace row with proper indices
-            trace_row = pd.Series(['', 'Trace'], index=['Z', 'Element'])
-            trace_row = pd.concat([trace_row, trace_sum])
-            
-            # Add trace row to DataFrame
-            df_with_z = pd.concat([df_with_z, pd.DataFrame([trace_row], index=['Trace'])])
+            summary_rows.append(('Trace', trace_sum))
             
             # Recalculate the total including trace
-            total_with_trace = df_with_z[concentration_cols].sum()
-            
-            # Create total row
-            total_row = pd.Series(['', 'Total'], index=['Z', 'Element'])
-            total_row = pd.concat([total_row, total_with_trace])
-            
-            # Add row to the DataFrame
-            df_with_z = pd.concat([df_with_z, pd.DataFrame([total_row], index=['Total'])])
-        else:
-            # Create total row without trace
-            total_row = pd.Series(['', 'Total'], index=['Z', 'Element'])
-            total_row = pd.concat([total_row, major_sum])
-            
-            # Add row to the DataFrame
-            df_with_z = pd.concat([df_with_z, pd.DataFrame([total_row], index=['Total'])])
+            major_sum = major_sum + trace_sum.reindex(concentration_cols).fillna(0)
+        
+        # Create total row
+        summary_rows.append(('Total', major_sum))
     
     # For trace tables, just add a total row
     elif element_type == 'trace':
-        # Get the columns that contain concentration data
-        concentration_cols = df_with_z.columns[2:]
-        
         # Calculate totals
-        total_values = df_with_z[concentration_cols].sum()
-        
-        # Create complete row with proper indices - blank Z value
-        total_row = pd.Series(['', 'Total'], index=['Z', 'Element'])
-        total_row = pd.concat([total_row, total_values])
-        
-        # Add row to the DataFrame
-        df_with_z = pd.concat([df_with_z, pd.DataFrame([total_row], index=['Total'])])
+        summary_rows.append(('Total', df_with_z[concentration_cols].sum()))
+    
+    if summary_rows:
+        # Stack the rows into one (rows x samples) array rather than building
+        # the frame from per-sample dict entries
+        summary_names = [name for name, _ in summary_rows]
+        summary_values = np.vstack([
+            values.reindex(concentration_cols).to_numpy(dtype=np.float64, na_value=np.nan)
+            for _, values in summary_rows
+        ])
+        summary_df = pd.DataFrame(summary_values, index=summary_names, columns=concentration_cols)
+        summary_df.insert(0, 'Element', summary_names)
+        summary_df.insert(0, 'Z', '')
+        df_with_z = pd.concat([df_with_z, summary_df])
+    
+    # Round values based on specified decimal places or defaults, once all
+    # rows are in place so the summary rows are computed from unrounded values
+    if round_digits is None:
+        round_digits = _rounding_digits(element_type, decimal_places)
+    df_with_z[concentration_cols] = df_with_z[concentration_cols].round(round_digits)
     
     return df_with_z
@@ -3,18 +3,75 @@ Excel formatter controller for XRF Data Manager.
 Handles formatting and saving tables to Excel.
 """
 
-import os
-import sys
+import functools
+import warnings
 from typing import Dict, Any, List
 
 import pandas as pd
 import numpy as np
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
-from openpyxl.utils.dataframe import dataframe_to_rows
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Border, Side, Alignment, NamedStyle
+from openpyxl.styles.borders import DEFAULT_BORDER
+from openpyxl.utils import get_column_letter
+from openpyxl.xml import LXML
 
-# Add parent directory to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+# openpyxl streams write-only workbooks through lxml when it is installed;
+# without it, every save takes the slower standard library path
+if not LXML:
+    warnings.warn(
+        "lxml is not installed; Excel files will be written more slowly",
+        RuntimeWarning
+    )
+
+# Style pieces shared by every cell that uses them
+CAPTION_FONT = Font(name='Arial', size=12, italic=False)
+BOLD_CAPTION_FONT = Font(name='Arial', size=12, bold=True)
+HEADER_FONT = Font(name='Arial', size=10, bold=True)
+NORMAL_FONT = Font(name='Arial', size=10)
+HEADER_FILL = PatternFill(start_color='D3D3D3', end_color='D3D3D3', fill_type='solid')
+THIN_BORDER = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+THICK_BOTTOM_BORDER = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='double')
+)
+CENTER_ALIGNMENT = Alignment(horizontal='center')
+LEFT_ALIGNMENT = Alignment(horizontal='left')
+
+# Named cell styles registered with each workbook. A cell takes all of a
+# named style in one assignment instead of a lookup per font, border, fill
+# and alignment.
+CELL_STYLES = {
+    'xrf_caption': dict(font=CAPTION_FONT, border=DEFAULT_BORDER, alignment=LEFT_ALIGNMENT),
+    'xrf_metadata_caption': dict(font=BOLD_CAPTION_FONT, border=DEFAULT_BORDER, alignment=LEFT_ALIGNMENT),
+    'xrf_header': dict(font=HEADER_FONT, fill=HEADER_FILL, border=THIN_BORDER, alignment=CENTER_ALIGNMENT),
+    'xrf_data': dict(font=NORMAL_FONT, border=THIN_BORDER, alignment=CENTER_ALIGNMENT),
+    'xrf_above_total': dict(font=NORMAL_FONT, border=THICK_BOTTOM_BORDER, alignment=CENTER_ALIGNMENT),
+    'xrf_metadata_key': dict(font=HEADER_FONT, border=THIN_BORDER, alignment=LEFT_ALIGNMENT),
+    'xrf_metadata_value': dict(font=NORMAL_FONT, border=THIN_BORDER, alignment=LEFT_ALIGNMENT),
+}
+
+# Widest a column is made to fit its contents, in characters
+MAX_COLUMN_WIDTH = 50
+
+# Caption text of each concentration table, with units
+TABLE_CAPTIONS = {
+    'absolute_major_elements': "Absolute major element concentrations (wt.%)",
+    'absolute_major_oxides': "Absolute major element concentrations reported as oxides (wt.%)",
+    'absolute_trace_elements': "Absolute trace element concentrations (ppm)",
+    'absolute_trace_oxides': "Absolute trace element concentrations reported as oxides (ppm)",
+    'relative_major_elements': "Relative major element concentrations (wt.%)",
+    'relative_major_oxides': "Relative major element concentrations reported as oxides (wt.%)",
+    'relative_trace_elements': "Relative trace element concentrations (ppm)",
+    'relative_trace_oxides': "Relative trace element concentrations reported as oxides (ppm)",
+}
 
 
 def save_tables_to_excel(
@@ -39,12 +96,11 @@ def save_tables_to_excel(
         return False
     
     try:
-        # Create workbook
-        wb = Workbook()
-        
-        # Remove default sheet
-        if 'Sheet' in wb.sheetnames:
-            wb.remove(wb.get_sheet_by_name('Sheet'))
+        # Create a write-only workbook so rows are streamed to the file
+        # instead of being kept in memory as Cell objects. It starts with no
+        # sheets, and every cell is styled as it is written.
+        wb = Workbook(write_only=True)
+        add_cell_styles(wb)
         
         # Add metadata and lookup sheets first
         if 'metadata' in tables:
@@ -65,19 +121,9 @@ def save_tables_to_excel(
             
             # Create caption
             caption = create_caption(table_name, metadata)
-            ws.append([caption])
-            ws.append([])  # Empty row after caption
             
-            # Fill NaN with missing data string
-            df_clean = df.copy()
-            df_clean = df_clean.fillna(missing_data)
-            
-            # Write data
-            for r_idx, row in enumerate(dataframe_to_rows(df_clean, index=False, header=True)):
-                ws.append(row)
-            
-            # Apply formatting
-            format_excel_sheet(ws, len(df_clean.columns), len(df_clean)+1)  # +1 for header
+            # Write formatted data, with missing data filled in as it is written
+            write_table_sheet(ws, caption, df, missing_data)
         
         # Save workbook
         wb.save(excel_path)
@@ -99,21 +145,27 @@ def create_metadata_sheet(wb, metadata_df, sheet_name):
     """
     ws = wb.create_sheet(sheet_name)
     
+    # Convert metadata to key/value rows
+    readable_metadata = [
+        (column, str(metadata_df[column].iloc[0])) for column in metadata_df.columns
+    ]
+    
+    # Column widths must be set before the first row is written
+    set_column_widths(ws, [
+        max((len(str(row[col])) for row in readable_metadata), default=0)
+        for col in range(2)
+    ])
+    
     # Create caption
-    ws.append(["Project Metadata"])
+    ws.append([styled_cell(ws, "Project Metadata", 'xrf_metadata_caption')])
     ws.append([])  # Empty row after caption
     
-    # Convert metadata to a more readable format
-    readable_metadata = []
-    for column in metadata_df.columns:
-        readable_metadata.append([column, str(metadata_df[column].iloc[0])])
-    
     # Write metadata
-    for row in readable_metadata:
-        ws.append(row)
-    
-    # Apply formatting
-    format_metadata_sheet(ws, 2, len(readable_metadata))
+    for key, value in readable_metadata:
+        ws.append([
+            styled_cell(ws, key, 'xrf_metadata_key'),
+            styled_cell(ws, value, 'xrf_metadata_value')
+        ])
 
 
 def create_lookup_sheet(wb, lookup_df, sheet_name):
@@ -126,64 +178,10 @@ def create_lookup_sheet(wb, lookup_df, sheet_name):
         sheet_name: Sheet name
     """
     ws = wb.create_sheet(sheet_name)
-    
-    # Create caption
-    ws.append(["Sample Lookup Table"])
-    ws.append([])  # Empty row after caption
-    
-    # Write data
-    for r_idx, row in enumerate(dataframe_to_rows(lookup_df, index=False, header=True)):
-        ws.append(row)
-    
-    # Apply formatting
-    format_excel_sheet(ws, len(lookup_df.columns), len(lookup_df)+1)  # +1 for header
-
-
-def format_metadata_sheet(worksheet, num_cols, num_rows):
-    """
-    Apply Excel formatting to metadata worksheet.
-    
-    Args:
-        worksheet: openpyxl worksheet
-        num_cols: Number of columns
-        num_rows: Number of rows
-    """
-    # Define styles
-    header_font = Font(name='Arial', size=12, bold=True)
-    normal_font = Font(name='Arial', size=10)
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    # Apply caption formatting
-    caption_cell = worksheet.cell(row=1, column=1)
-    caption_cell.font = Font(name='Arial', size=12, bold=True)
-    caption_cell.alignment = Alignment(horizontal='left')
-    
-    # Get the range of data cells (excluding caption and empty row)
-    data_start_row = 3
-    data_end_row = data_start_row + num_rows
-    
-    # Format data rows
-    for row in range(data_start_row, data_end_row):
-        for col in range(1, num_cols + 1):
-            cell = worksheet.cell(row=row, column=col)
-            if col == 1:  # Key column
-                cell.font = Font(name='Arial', size=10, bold=True)
-            else:  # Value column
-                cell.font = normal_font
-            cell.border = thin_border
-            cell.alignment = Alignment(horizontal='left')
-    
-    # Auto-size columns
-    for col in range(1, num_cols + 1):
-        column_letter = worksheet.cell(row=1, column=col).column_letter
-        worksheet.column_dimensions[column_letter].auto_size = True
+    write_table_sheet(ws, "Sample Lookup Table", lookup_df)
 
 
+@functools.lru_cache(maxsize=256)
 def format_sheet_name(table_name: str) -> str:
     """
     Format table name to sheet name.
@@ -229,33 +227,32 @@ def create_caption(table_name: str, metadata: Dict[str, Any]) -> str:
     project_name = metadata.get('project_name', '')
     client_name = metadata.get('client_name', '')
     
-    # Create base caption
-    caption = f"Table X. "
-    
-    # Add table type specific text with units
-    if 'absolute_major' in table_name:
-        caption += "Absolute major element concentrations"
-        if 'element' in table_name:
-            caption += " (wt.%)"
-    elif 'absolute_trace' in table_name:
-        caption += "Absolute trace element concentrations"
-        if 'element' in table_name:
-            caption += " (ppm)"
-    elif 'relative_major' in table_name:
-        caption += "Relative major element concentrations"
-        if 'element' in table_name:
-            caption += " (wt.%)"
-    elif 'relative_trace' in table_name:
-        caption += "Relative trace element concentrations"
-        if 'element' in table_name:
-            caption += " (ppm)"
-    
-    # Add oxide info if in table name
-    if 'oxide' in table_name:
-        if 'major' in table_name:
-            caption += " reported as oxides (wt.%)"
-        else:  # trace
-            caption += " reported as oxides (ppm)"
+    return _create_caption_cached(table_name, project_number, project_name, client_name)
+
+
+@functools.lru_cache(maxsize=256)
+def _create_caption_cached(
+    table_name: str,
+    project_number: str,
+    project_name: str,
+    client_name: str
+) -> str:
+    """
+    Create a caption for the table from the metadata fields it uses.
+    
+    Cached, as the same captions are created on every export of a project.
+    
+    Args:
+        table_name: Table name
+        project_number: Project number
+        project_name: Project name
+        client_name: Client name
+        
+    Returns:
+        Caption string
+    """
+    # Create base caption with table type specific text and units
+    caption = "Table X. " + TABLE_CAPTIONS.get(table_name, '')
     
     # Add project info
     if project_number or project_name:
@@ -270,74 +267,132 @@ def create_caption(table_name: str, metadata: Dict[str, Any]) -> str:
     return caption
 
 
-def format_excel_sheet(worksheet, num_cols, num_rows):
+def add_cell_styles(wb):
     """
-    Apply Excel formatting to worksheet.
+    Register the named cell styles with a workbook.
+    
+    Args:
+        wb: Workbook
+    """
+    for name, style in CELL_STYLES.items():
+        wb.add_named_style(NamedStyle(name=name, **style))
+
+
+def styled_cell(worksheet, value, style):
+    """
+    Create a write-only cell with a named style applied.
+    
+    Args:
+        worksheet: Write-only worksheet the cell belongs to
+        value: Cell value
+        style: Name of a style from CELL_STYLES
+        
+    Returns:
+        Styled WriteOnlyCell
+    """
+    cell = WriteOnlyCell(worksheet, value=value)
+    cell.style = style
+    return cell
+
+
+def column_widths(df, missing_data=None) -> List[int]:
+    """
+    Get the length of the longest text in each column of a table.
+    
+    Args:
+        df: Table DataFrame
+        missing_data: String written in place of NaN/None, if any
+        
+    Returns:
+        List of lengths in characters, headers included
+    """
+    if df.empty:
+        return [len(str(column)) for column in df.columns]
+    
+    # Length of every value as text, in one pass over the whole table
+    lengths = np.char.str_len(df.to_numpy(dtype=object).astype(str))
+    if missing_data is not None:
+        lengths[df.isna().to_numpy()] = len(missing_data)
+    
+    return [
+        max(len(str(column)), int(length))
+        for column, length in zip(df.columns, lengths.max(axis=0))
+    ]
+
+
+def set_column_widths(worksheet, widths):
+    """
+    Set the widths of the first columns of a worksheet to fit their text.
+    
+    Write-only worksheets write their column settings with the first row,
+    so this must be called before anything is appended.
     
     Args:
         worksheet: openpyxl worksheet
-        num_cols: Number of columns
-        num_rows: Number of rows
+        widths: Length of the longest text in each column
     """
-    # Define styles
-    header_font = Font(name='Arial', size=10, bold=True)
-    header_fill = PatternFill(start_color='D3D3D3', end_color='D3D3D3', fill_type='solid')
-    normal_font = Font(name='Arial', size=10)
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    thick_bottom_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='double')
-    )
+    for col, width in enumerate(widths, 1):
+        # Leave some padding, but keep very long values from making huge columns
+        worksheet.column_dimensions[get_column_letter(col)].width = min(width + 2, MAX_COLUMN_WIDTH)
+
+
+def data_row_styles(df) -> np.ndarray:
+    """
+    Pick the named style for each data row of a table.
     
-    # Apply caption formatting
-    caption_cell = worksheet.cell(row=1, column=1)
-    caption_cell.font = Font(name='Arial', size=12, italic=False)
-    caption_cell.alignment = Alignment(horizontal='left')
-    
-    # Get the range of data cells (excluding caption and empty row)
-    data_start_row = 3
-    data_end_row = data_start_row + num_rows
-    
-    # Format header row
-    for col in range(1, num_cols + 1):
-        cell = worksheet.cell(row=data_start_row, column=col)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.border = thin_border
-        cell.alignment = Alignment(horizontal='center')
-    
-    # Find total row index (if exists)
-    total_row_index = None
-    for row in range(data_start_row + 1, data_end_row):
-        cell_value = worksheet.cell(row=row, column=2).value
-        if cell_value == 'Total':
-            total_row_index = row
-            break
-    
-    # Format data rows
-    for row in range(data_start_row + 1, data_end_row):
-        for col in range(1, num_cols + 1):
-            cell = worksheet.cell(row=row, column=col)
-            cell.font = normal_font
-            
-            # Apply appropriate border - double line ABOVE the total row
-            if total_row_index and row == total_row_index - 1:
-                # Cell above total row gets double bottom border
-                cell.border = thick_bottom_border
-            else:
-                cell.border = thin_border
-            
-            # Center align all cells
-            cell.alignment = Alignment(horizontal='center')
+    Args:
+        df: Table DataFrame
+        
+    Returns:
+        Array of style names, one per row of df
+    """
+    row_styles = np.full(len(df), 'xrf_data', dtype=object)
+    
+    # Double line ABOVE the total row
+    if 'Element' in df.columns:
+        total_positions = np.flatnonzero(df['Element'].to_numpy() == 'Total')
+        if total_positions.size and total_positions[0] > 0:
+            row_styles[total_positions[0] - 1] = 'xrf_above_total'
+    
+    return row_styles
+
+
+def write_table_sheet(worksheet, caption, df, missing_data=None):
+    """
+    Write a captioned, formatted table to a write-only worksheet.
     
-    # Auto-size columns
-    for col in range(1, num_cols + 1):
-        column_letter = worksheet.cell(row=1, column=col).column_letter
-        worksheet.column_dimensions[column_letter].auto_size = True
+    Args:
+        worksheet: openpyxl write-only worksheet
+        caption: Caption for the first row
+        df: DataFrame to write, with its header
+        missing_data: String to write in place of NaN/None, or None to
+            write them as they are
+    """
+    # Column widths must be set before the first row is written
+    set_column_widths(worksheet, column_widths(df, missing_data))
+    
+    # Create caption
+    worksheet.append([styled_cell(worksheet, caption, 'xrf_caption')])
+    worksheet.append([])  # Empty row after caption
+    
+    # Write header row
+    worksheet.append([
+        styled_cell(worksheet, value, 'xrf_header')
+        for value in df.columns
+    ])
+    
+    # Stream rows as plain tuples rather than copying the frame to fill it
+    rows = df.itertuples(index=False, name=None)
+    if missing_data is not None:
+        # value != value is only true for NaN
+        rows = (
+            tuple(missing_data if value is None or value != value else value for value in row)
+            for row in rows
+        )
+    
+    # Write data rows with their styles decided up front
+    for row, style in zip(rows, data_row_styles(df)):
+        worksheet.append([
+            styled_cell(worksheet, value, style)
+            for value in row
+        ])
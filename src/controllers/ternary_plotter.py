@@ -3,8 +3,9 @@ ternary_plotter.py
 Generates static ternary plots for common oxide systems in geology and cement science.
 """
 import ternary
+import numpy as np
 import matplotlib.pyplot as plt
-from typing import List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 
 # Common ternary systems
 TERNARY_SYSTEMS = {
@@ -15,39 +16,96 @@ TERNARY_SYSTEMS = {
     "CaO-Al2O3-Fe2O3": ("CaO", "Al2O3", "Fe2O3"),
 }
 
+# Fixed size and layout of saved figures, in inches and figure fractions. The
+# layout leaves room for the legend on the right and the caption at the
+# bottom, so files can be saved without a bbox_inches='tight' probe render.
+SAVED_FIGURE_SIZE = (8, 7)
+SAVED_LAYOUT_RECT = (0, 0.04, 0.9, 1)
+
+# Saved figures by system, reused for later saves of the same system:
+# (figure, ternary axes, artists of the last plot drawn on it)
+_FIGURE_CACHE: Dict[str, Tuple[Any, Any, list]] = {}
+
 def plot_ternary(system: str, data: List[Tuple[float, float, float]], caption: Optional[str] = None, save_path: Optional[str] = None):
     """
     Plots a ternary diagram for the selected system.
     
     Args:
         system: Name of the ternary system
-        data: List of (A, B, C) tuples, each summing to 100 (or will be normalized)
+        data: List (or N x 3 array) of (A, B, C) tuples, each summing to 100 (or will be normalized)
         caption: Optional caption to display below the plot
         save_path: If provided, saves the plot to this path (supports PNG, PDF, SVG)
     """
     if system not in TERNARY_SYSTEMS:
         raise ValueError(f"Unknown ternary system: {system}")
     
-    if not data or len(data) == 0:
+    if data is None or len(data) == 0:
         raise ValueError("No data points provided for ternary plot")
     
-    labels = TERNARY_SYSTEMS[system]
+    # Normalize data if not already (ensure each point sums to 100),
+    # all points at once
+    points = np.asarray(data, dtype=float)
+    totals = points.sum(axis=1)
     
-    # Normalize data if not already (ensure each point sums to 100)
-    norm_data = []
-    for point in data:
-        total = sum(point)
-        if total > 0:
-            norm_data.append(tuple(100 * x / total for x in point))
-        else:
-            # Skip points with zero sum
-            continue
+    # Skip points with zero sum
+    valid = totals > 0
+    norm_data = 100 * points[valid] / totals[valid, None]
     
-    if not norm_data:
+    if len(norm_data) == 0:
         raise ValueError("No valid data points after normalization")
     
     print(f"Plotting {len(norm_data)} points for {system}")
     
+    if save_path:
+        # Reuse the figure of the system if one was saved before; only the
+        # points, legend and caption of the previous plot are replaced
+        cached = _FIGURE_CACHE.get(system)
+        if cached is None:
+            fig, tax = _create_ternary_figure(system)
+            fig.set_size_inches(*SAVED_FIGURE_SIZE)
+            plot_artists = _draw_points(fig, tax, norm_data, caption)
+            fig.tight_layout(rect=SAVED_LAYOUT_RECT)
+            
+            # Keep the figure out of pyplot, so a later plt.show() does not
+            # display it
+            plt.close(fig)
+            _FIGURE_CACHE[system] = (fig, tax, plot_artists)
+        else:
+            fig, tax, plot_artists = cached
+            for artist in plot_artists:
+                artist.remove()
+            plot_artists[:] = _draw_points(fig, tax, norm_data, caption)
+        
+        # Determine file format from extension
+        file_ext = save_path.lower().split('.')[-1]
+        
+        if file_ext in ('pdf', 'svg'):
+            # Vector formats do not need a resolution
+            fig.savefig(save_path, format=file_ext, bbox_inches=None, facecolor='white')
+        else:
+            # PNG, or the format of the extension
+            fig.savefig(save_path, dpi=300, bbox_inches=None, facecolor='white')
+        
+        print(f"Ternary plot saved to: {save_path}")
+    else:
+        fig, tax = _create_ternary_figure(system)
+        _draw_points(fig, tax, norm_data, caption)
+        fig.tight_layout()
+        plt.show()  # Blocking show for interactive viewing in Qt
+        plt.close()
+
+def _create_ternary_figure(system: str):
+    """
+    Creates the parts of a ternary diagram that only depend on the system.
+    
+    Args:
+        system: Name of the ternary system
+    
+    Returns:
+        Tuple of (figure, ternary axes)
+    """
+    labels = TERNARY_SYSTEMS[system]
+    
     # Create ternary plot
     fig, tax = ternary.figure(scale=100)
     tax.boundary(linewidth=2.0)
@@ -58,40 +116,40 @@ def plot_ternary(system: str, data: List[Tuple[float, float, float]], caption: O
     tax.right_axis_label(labels[2], fontsize=12, offset=0.14)
     tax.bottom_axis_label(labels[0], fontsize=12, offset=0.05)
     
+    # Set title
+    tax.get_axes().set_title(f"Ternary Diagram: {system}", fontsize=14, pad=20)
+    
+    return fig, tax
+
+def _draw_points(fig, tax, norm_data, caption: Optional[str] = None) -> list:
+    """
+    Draws the data points, legend and caption onto a ternary figure.
+    
+    Args:
+        fig: Figure from _create_ternary_figure
+        tax: Ternary axes of the figure
+        norm_data: Normalized (A, B, C) points
+        caption: Optional caption to display below the plot
+    
+    Returns:
+        List of the artists drawn, for removing them again
+    """
+    ax = tax.get_axes()
+    collection_count = len(ax.collections)
+    
     # Plot data points
     tax.scatter(norm_data, marker='o', color='blue', s=50, alpha=0.7, label='Samples', edgecolors='black', linewidth=0.5)
+    artists = list(ax.collections[collection_count:])
     
     # Add legend
     tax.legend(loc='upper right', bbox_to_anchor=(1.15, 1))
-    
-    # Set title
-    plt.title(f"Ternary Diagram: {system}", fontsize=14, pad=20)
+    artists.append(ax.get_legend())
     
     # Add caption if provided
     if caption:
-        plt.figtext(0.5, 0.02, caption, wrap=True, horizontalalignment='center', fontsize=10)
+        artists.append(fig.text(0.5, 0.02, caption, wrap=True, horizontalalignment='center', fontsize=10))
     
-    plt.tight_layout()
-    
-    if save_path:
-        # Determine file format from extension
-        file_ext = save_path.lower().split('.')[-1]
-        
-        if file_ext == 'png':
-            plt.savefig(save_path, dpi=300, bbox_inches='tight', facecolor='white')
-        elif file_ext == 'pdf':
-            plt.savefig(save_path, format='pdf', bbox_inches='tight', facecolor='white')
-        elif file_ext == 'svg':
-            plt.savefig(save_path, format='svg', bbox_inches='tight', facecolor='white')
-        else:
-            # Default to PNG
-            plt.savefig(save_path, dpi=300, bbox_inches='tight', facecolor='white')
-        
-        plt.close()
-        print(f"Ternary plot saved to: {save_path}")
-    else:
-        plt.show()  # Blocking show for interactive viewing in Qt
-        plt.close()
+    return artists
 
 def get_available_systems():
     """Returns a list of available ternary systems."""
@@ -3,14 +3,53 @@ Element data module for XRF Data Manager.
 Handles element classification, oxide conversion, and normalization.
 """
 
-from typing import Dict, List, Tuple, Any
-import sys
-import os
+from typing import Dict, List, Tuple, Any, Optional
 
-# Add parent directory to path to import config
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+import numpy as np
+import pandas as pd
+
+# config is a top-level module of the repository root, which the
+# application runs from
 import config
 
+# Units of concentration values, as opposed to e.g. kcps intensities
+CONCENTRATION_UNITS = frozenset({'%', 'ppm'})
+
+# Factor converting a concentration in each unit to %
+PERCENT_FACTORS = {'%': 1.0, 'ppm': config.PPM_TO_PERCENT}
+
+# Oxide forms as arrays for batch lookups. OXIDE_ELEMENTS gives the position
+# of an element in OXIDE_FORMULAS/OXIDE_FACTOR_VALUES; both arrays end with a
+# NaN entry, so the -1 that get_indexer returns for elements without an oxide
+# form selects NaN without any masking.
+OXIDE_ELEMENTS = pd.Index(list(config.OXIDE_FACTORS), dtype=object)
+OXIDE_FORMULAS = np.array([oxide for oxide, _ in config.OXIDE_FACTORS.values()] + [np.nan], dtype=object)
+OXIDE_FACTOR_VALUES = np.array([factor for _, factor in config.OXIDE_FACTORS.values()] + [np.nan])
+
+
+def build_element_frame(elements_data: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Build a columnar frame from element data dictionaries.
+    
+    The frame forms of the functions below work on whole columns instead of
+    one dictionary at a time.
+    
+    Args:
+        elements_data: List of element data dictionaries
+        
+    Returns:
+        DataFrame with 'element', 'unit' and 'concentration' columns, one
+        row per dictionary
+    """
+    return pd.DataFrame({
+        'element': pd.Series([element_data['element'] for element_data in elements_data], dtype=object),
+        'unit': pd.Series([element_data['unit'] for element_data in elements_data], dtype=object),
+        'concentration': np.fromiter(
+            (element_data['concentration'] for element_data in elements_data),
+            dtype=np.float64, count=len(elements_data)
+        )
+    })
+
 
 def classify_element(element_data: Dict[str, Any]) -> str:
     """
@@ -37,6 +76,58 @@ def classify_element(element_data: Dict[str, Any]) -> str:
     return 'major'
 
 
+def classify_trace_array(units: np.ndarray, concentrations: np.ndarray) -> np.ndarray:
+    """
+    Classify many element rows as trace at once (array form of classify_element).
+    
+    Args:
+        units: Array of concentration units ('%' or 'ppm')
+        concentrations: Array of concentrations
+        
+    Returns:
+        Boolean array, True for trace rows and False for major rows
+    """
+    # <= 1000 ppm or <= 0.1% is trace, anything else is major
+    return np.where(
+        units == 'ppm',
+        concentrations <= config.TRACE_THRESHOLD,
+        (units == '%') & (concentrations <= 0.1)
+    )
+
+
+def get_oxide_form(element: str, unit: str) -> Optional[Tuple[str, float]]:
+    """
+    Get the oxide formula and conversion factor of an element.
+    
+    Args:
+        element: Element symbol
+        unit: Concentration unit
+        
+    Returns:
+        Tuple of (oxide formula, factor), or None for elements without an
+        oxide factor or non-concentration units
+    """
+    if unit == 'kcps':
+        return None
+    
+    return config.OXIDE_FACTORS.get(element)
+
+
+def oxide_form_arrays(elements) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Look up the oxide forms of many elements at once.
+    
+    Args:
+        elements: Array-like of element symbols
+        
+    Returns:
+        Tuple of (array of oxide formulas, array of conversion factors),
+        NaN for elements without an oxide factor
+    """
+    positions = OXIDE_ELEMENTS.get_indexer(elements)
+    return OXIDE_FORMULAS[positions], OXIDE_FACTOR_VALUES[positions]
+
+
 def convert_to_oxide(element_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Convert element concentration to its oxide form.
@@ -52,7 +143,8 @@ def convert_to_oxide(element_data: Dict[str, Any]) -> Dict[str, Any]:
     unit = element_data['unit']
     
     # Skip non-elements or elements without oxide factors
-    if element not in config.OXIDE_FACTORS or unit == 'kcps':
+    oxide_form = get_oxide_form(element, unit)
+    if oxide_form is None:
         return {
             'oxide': None,
             'oxide_concentration': None,
@@ -60,7 +152,7 @@ def convert_to_oxide(element_data: Dict[str, Any]) -> Dict[str, Any]:
         }
     
     # Get oxide formula and factor
-    oxide_formula, factor = config.OXIDE_FACTORS[element]
+    oxide_formula, factor = oxide_form
     
     # Convert concentration to oxide
     oxide_concentration = concentration * factor
@@ -72,6 +164,73 @@ def convert_to_oxide(element_data: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+def concentration_percent_array(
+    elements_data: List[Dict[str, Any]],
+    ignore_elements: List[str] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert the concentrations of element data dictionaries to % in one go.
+    
+    Args:
+        elements_data: List of element data dictionaries
+        ignore_elements: List of elements to ignore
+        
+    Returns:
+        Tuple of (boolean array, True for rows that are concentrations of
+        elements not ignored; array of concentrations in %)
+    """
+    # frozenset for O(1) membership tests (returned as-is if already one)
+    ignore_elements = frozenset(ignore_elements or ())
+    
+    count = len(elements_data)
+    concentrations = np.fromiter(
+        (element_data['concentration'] for element_data in elements_data), dtype=float, count=count
+    )
+    # Other units (e.g. kcps) are left as they are
+    percent_factors = np.fromiter(
+        (PERCENT_FACTORS.get(element_data['unit'], 1.0) for element_data in elements_data),
+        dtype=float, count=count
+    )
+    
+    # Non-concentration values (e.g. kcps) are not counted
+    is_counted = np.fromiter(
+        (element_data['unit'] in CONCENTRATION_UNITS and element_data['element'] not in ignore_elements
+         for element_data in elements_data),
+        dtype=bool, count=count
+    )
+    
+    # Convert ppm to %
+    return is_counted, concentrations * percent_factors
+
+
+def convert_to_oxide_frame(element_frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert the rows of an element frame to their oxide forms.
+    
+    Args:
+        element_frame: Frame from build_element_frame
+        
+    Returns:
+        DataFrame on the same index with 'oxide', 'oxide_factor',
+        'oxide_concentration' and 'oxide_unit' columns (NaN for elements
+        without an oxide factor or non-concentration units)
+    """
+    oxide, oxide_factor = oxide_form_arrays(element_frame['element'])
+    
+    # Skip non-elements or elements without oxide factors
+    is_signal = (element_frame['unit'] == 'kcps').to_numpy()
+    oxide[is_signal] = np.nan
+    oxide_factor[is_signal] = np.nan
+    has_oxide = ~np.isnan(oxide_factor)
+    
+    return pd.DataFrame({
+        'oxide': oxide,
+        'oxide_factor': oxide_factor,
+        'oxide_concentration': element_frame['concentration'].to_numpy() * oxide_factor,
+        'oxide_unit': element_frame['unit'].where(has_oxide)  # Unit stays the same
+    }, index=element_frame.index)
+
+
 def normalize_concentrations(elements_data: List[Dict[str, Any]], 
                              all_elements_data: List[Dict[str, Any]] = None,
                              ignore_elements: List[str] = None) -> List[Dict[str, Any]]:
@@ -86,59 +245,84 @@ def normalize_concentrations(elements_data: List[Dict[str, Any]],
     Returns:
         List of element data dictionaries with normalized concentrations
     """
-    if ignore_elements is None:
-        ignore_elements = []
-    
-    # Use all_elements_data if provided, otherwise use elements_data
-    data_for_normalization = all_elements_data if all_elements_data is not None else elements_data
-    
-    # Filter out ignored elements and non-concentration values (e.g. kcps)
-    filtered_normalization_data = []
-    for element_data in data_for_normalization:
-        if (element_data['element'] not in ignore_elements and 
-            element_data['unit'] in ['%', 'ppm']):
-            filtered_normalization_data.append(element_data.copy())
-    
-    # Calculate total concentration (as %) for ALL elements
-    total_percent = 0
-    for element_data in filtered_normalization_data:
-        if element_data['unit'] == 'ppm':
-            # Convert ppm to %
-            concentration_percent = element_data['concentration'] * config.PPM_TO_PERCENT
-        else:
-            concentration_percent = element_data['concentration']
-        
-        total_percent += concentration_percent
+    # Convert once for both conversions below
+    ignore_elements = frozenset(ignore_elements or ())
+    
+    # Convert the elements in elements_data, skipping ignored elements and
+    # non-concentration values (e.g. kcps)
+    is_counted, concentration_percent = concentration_percent_array(elements_data, ignore_elements)
+    rows = np.flatnonzero(is_counted)
+    concentration_percent = concentration_percent[rows]
+    
+    # Calculate total concentration (as %) for ALL elements: all_elements_data
+    # if provided, otherwise the rows just converted
+    if all_elements_data is not None:
+        is_total_counted, total_concentration_percent = concentration_percent_array(
+            all_elements_data, ignore_elements
+        )
+        total_percent = total_concentration_percent[is_total_counted].sum()
+    else:
+        total_percent = concentration_percent.sum()
     
     # Store normalization factor
     normalization_factor = 100 / total_percent if total_percent > 0 else 1
     
     # Apply normalization to the elements in elements_data
+    normalized_percent = concentration_percent * normalization_factor
+    
     filtered_elements = []
-    for element_data in elements_data:
-        if (element_data['element'] not in ignore_elements and 
-            element_data['unit'] in ['%', 'ppm']):
-            element_copy = element_data.copy()
-            
-            # Calculate normalized concentration
-            if element_copy['unit'] == 'ppm':
-                # Keep track of original unit for proper output
-                element_copy['concentration_percent'] = element_copy['concentration'] * config.PPM_TO_PERCENT
-                normalized_percent = element_copy['concentration_percent'] * normalization_factor
-                
-                # Store both normalized forms - in % and in original unit (ppm)
-                element_copy['normalized_concentration'] = normalized_percent
-                element_copy['normalized_concentration_original'] = normalized_percent * 10000  # % to ppm
-            else:
-                element_copy['concentration_percent'] = element_copy['concentration']
-                element_copy['normalized_concentration'] = element_copy['concentration'] * normalization_factor
-                element_copy['normalized_concentration_original'] = element_copy['normalized_concentration']
-            
-            filtered_elements.append(element_copy)
+    for row, percent, normalized in zip(rows.tolist(), concentration_percent.tolist(), normalized_percent.tolist()):
+        element_copy = elements_data[row].copy()
+        element_copy['concentration_percent'] = percent
+        element_copy['normalized_concentration'] = normalized
+        
+        # Store the normalized value in the original unit too (% to ppm)
+        if element_copy['unit'] == 'ppm':
+            element_copy['normalized_concentration_original'] = normalized * 10000
+        else:
+            element_copy['normalized_concentration_original'] = normalized
+        
+        filtered_elements.append(element_copy)
     
     return filtered_elements
 
 
+def normalize_concentration_array(
+    sample_index: np.ndarray,
+    units: np.ndarray,
+    concentrations: np.ndarray,
+    sample_count: int
+) -> np.ndarray:
+    """
+    Normalize the concentration rows of many samples at once.
+    
+    Array form of normalize_concentrations: each sample is scaled so that its
+    rows sum to 100%, and the result is given in each row's original unit.
+    
+    Args:
+        sample_index: Array with the sample number of each row
+        units: Array of concentration units ('%' or 'ppm')
+        concentrations: Array of concentrations
+        sample_count: Number of samples
+        
+    Returns:
+        Array of normalized concentrations (ppm rows in ppm, % rows in %)
+    """
+    is_ppm = units == 'ppm'
+    concentration_percent = np.where(is_ppm, concentrations * config.PPM_TO_PERCENT, concentrations)
+    
+    # Total concentration (as %) of every sample
+    total_percent = np.bincount(sample_index, weights=concentration_percent, minlength=sample_count)
+    
+    # Normalization factor of every sample, 1 where there is nothing to normalize
+    positive = total_percent > 0
+    normalization_factor = np.ones(sample_count)
+    normalization_factor[positive] = 100 / total_percent[positive]
+    
+    normalized_percent = concentration_percent * normalization_factor[sample_index]
+    return np.where(is_ppm, normalized_percent * 10000, normalized_percent)  # % to ppm
+
+
 def calculate_balance(elements_data: List[Dict[str, Any]], ignore_elements: List[str] = None) -> float:
     """
     Calculate the balance (100 - sum of all elements).
@@ -150,22 +334,9 @@ def calculate_balance(elements_data: List[Dict[str, Any]], ignore_elements: List
     Returns:
         Balance value (100 - sum)
     """
-    if ignore_elements is None:
-        ignore_elements = []
-    
     # Sum all element concentrations (in %)
-    total_percent = 0
-    for element_data in elements_data:
-        if (element_data['element'] not in ignore_elements and 
-            element_data['unit'] in ['%', 'ppm']):
-            
-            if element_data['unit'] == 'ppm':
-                # Convert ppm to %
-                concentration_percent = element_data['concentration'] * config.PPM_TO_PERCENT
-            else:
-                concentration_percent = element_data['concentration']
-            
-            total_percent += concentration_percent
+    is_counted, concentration_percent = concentration_percent_array(elements_data, ignore_elements)
+    total_percent = float(concentration_percent[is_counted].sum())
     
     # Calculate balance
     balance = 100 - total_percent
@@ -183,23 +354,16 @@ def convert_to_weight_percent(elements_data: List[Dict[str, Any]]) -> List[Dict[
     Returns:
         List of element data dictionaries with wt% added
     """
-    result = []
-    
-    for element_data in elements_data.copy():
-        # Add the original data
-        new_data = element_data.copy()
-        
-        # Convert to weight percent
-        if element_data['unit'] == 'ppm':
-            new_data['wt_percent'] = element_data['concentration'] * config.PPM_TO_PERCENT
-        elif element_data['unit'] == '%':
-            new_data['wt_percent'] = element_data['concentration']
-        else:
-            new_data['wt_percent'] = None  # Non-concentration units like kcps
-        
-        result.append(new_data)
+    is_concentration, concentration_percent = concentration_percent_array(elements_data)
     
-    return result
+    # Add the original data, with None for non-concentration units like kcps.
+    # The input dictionaries are left untouched.
+    return [
+        {**element_data, 'wt_percent': percent if counted else None}
+        for element_data, counted, percent in zip(
+            elements_data, is_concentration.tolist(), concentration_percent.tolist()
+        )
+    ]
 
 
 def get_element_atomic_number(element: str) -> int:
@@ -5,7 +5,13 @@ Handles sample lookup table management.
 
 import os
 import csv
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Union
+
+# Columns of the lookup table file, in file order
+LOOKUP_COLUMNS = ('sample_id', 'notebook_id', 'client_id', 'report_abbreviation')
+
+# Write buffer for the lookup table file, so large tables go out in few writes
+LOOKUP_FILE_BUFFER_SIZE = 1 << 20
 
 
 def create_empty_lookup_table() -> List[Dict[str, str]]:
@@ -53,21 +59,31 @@ def load_lookup_table(xrf_folder: str) -> List[Dict[str, str]]:
     """
     lookup_file = os.path.join(xrf_folder, 'sample_lookup.csv')
     
-    if os.path.exists(lookup_file):
-        try:
-            lookup_table = []
-            
-            with open(lookup_file, 'r', newline='') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    lookup_table.append(row)
+    # A missing file, like an unreadable one, gives an empty table, so the
+    # file is opened without checking for it first
+    try:
+        lookup_table = []
+        
+        with open(lookup_file, 'r', newline='') as file:
+            reader = csv.reader(file)
+            header = next(reader, None)
+            if header is None:
+                return lookup_table
             
-            return lookup_table
-        except Exception:
-            # If error loading, return empty
-            return create_empty_lookup_table()
-    else:
-        # File doesn't exist, return empty
+            # Zip each row with the header rather than building rows
+            # through DictReader; blank lines are skipped and short
+            # rows padded with None, as DictReader does
+            width = len(header)
+            for row in reader:
+                if not row:
+                    continue
+                if len(row) < width:
+                    row += [None] * (width - len(row))
+                lookup_table.append(dict(zip(header, row)))
+        
+        return lookup_table
+    except Exception:
+        # If the file is missing or can't be loaded, return empty
         return create_empty_lookup_table()
 
 
@@ -85,21 +101,19 @@ def save_lookup_table(xrf_folder: str, lookup_table: List[Dict[str, str]]) -> bo
     lookup_file = os.path.join(xrf_folder, 'sample_lookup.csv')
     
     try:
-        # Ensure all rows have the same columns
-        fieldnames = ['sample_id', 'notebook_id', 'client_id', 'report_abbreviation']
-        
-        with open(lookup_file, 'w', newline='') as file:
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-            writer.writeheader()
-            for row in lookup_table:
-                # Ensure all fields exist
-                safe_row = {
-                    'sample_id': row.get('sample_id', ''),
-                    'notebook_id': row.get('notebook_id', ''),
-                    'client_id': row.get('client_id', ''),
-                    'report_abbreviation': row.get('report_abbreviation', '')
-                }
-                writer.writerow(safe_row)
+        # Write to a temporary file first so a failed save never leaves a
+        # partly written lookup table behind
+        temp_file = lookup_file + '.tmp'
+        with open(temp_file, 'w', newline='', buffering=LOOKUP_FILE_BUFFER_SIZE) as file:
+            writer = csv.writer(file)
+            writer.writerow(LOOKUP_COLUMNS)
+            
+            # Ensure all rows have the same columns, with empty missing fields
+            writer.writerows(
+                [row.get(column, '') for column in LOOKUP_COLUMNS]
+                for row in lookup_table
+            )
+        os.replace(temp_file, lookup_file)
         
         return True
     except Exception:
@@ -140,17 +154,69 @@ def merge_lookup_data(existing_table: List[Dict[str, str]], sample_ids: List[str
     return merged_table
 
 
-def get_lookup_data_by_sample_id(lookup_table: List[Dict[str, str]], sample_id: str) -> Dict[str, str]:
+def build_lookup_index(lookup_table: List[Dict[str, str]]) -> Dict[str, Dict[str, str]]:
     """
-    Get lookup data for a specific sample ID.
+    Index a lookup table by sample ID for repeated lookups.
     
     Args:
         lookup_table: Lookup table
+        
+    Returns:
+        Dictionary mapping each sample ID to its first row in the table
+    """
+    lookup_index = {}
+    
+    for row in lookup_table:
+        # Keep the first row for duplicate IDs, like a linear scan would
+        lookup_index.setdefault(row.get('sample_id', ''), row)
+    
+    return lookup_index
+
+
+def get_lookup_data_from_index(lookup_index: Dict[str, Dict[str, str]], sample_id: str) -> Dict[str, str]:
+    """
+    Get lookup data for a specific sample ID from a prebuilt index.
+    
+    Args:
+        lookup_index: Index created by build_lookup_index
         sample_id: Sample ID to look up
         
     Returns:
         Dictionary with lookup data or empty dict if not found
     """
+    row = lookup_index.get(sample_id)
+    if row is not None:
+        return row
+    
+    # Not found
+    return {
+        'sample_id': sample_id,
+        'notebook_id': '',
+        'client_id': '',
+        'report_abbreviation': ''
+    }
+
+
+def get_lookup_data_by_sample_id(
+    lookup_table: Union[List[Dict[str, str]], Dict[str, Dict[str, str]]],
+    sample_id: str
+) -> Dict[str, str]:
+    """
+    Get lookup data for a specific sample ID.
+    
+    Scanning the table is O(n) per call; callers looking up many samples
+    should pass the index from build_lookup_index instead.
+    
+    Args:
+        lookup_table: Lookup table, or an index created by build_lookup_index
+        sample_id: Sample ID to look up
+        
+    Returns:
+        Dictionary with lookup data or empty dict if not found
+    """
+    if isinstance(lookup_table, dict):
+        return get_lookup_data_from_index(lookup_table, sample_id)
+    
     for row in lookup_table:
         if row.get('sample_id', '') == sample_id:
             return row
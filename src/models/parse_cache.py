@@ -0,0 +1,226 @@
+"""
+Parse cache module for XRF Data Manager.
+Keeps parsed .qan files in a per-user cache, so unchanged files are not
+parsed again in the same or later sessions.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import threading
+from typing import Dict, List, Tuple, Any, Iterator, Optional
+
+from src.models.qan_parser import (
+    iter_qan_files, read_qan_files_parallel, PARALLEL_PARSE_MIN_FILES
+)
+
+
+def _user_cache_dir() -> str:
+    """
+    Get the platform's per-user cache directory for the application.
+    
+    Returns:
+        Path of the directory (not created here)
+    """
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser(os.path.join('~', 'AppData', 'Local'))
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser(os.path.join('~', 'Library', 'Caches'))
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser(os.path.join('~', '.cache'))
+    return os.path.join(base, 'XRF_Data_Manager', 'parse_cache')
+
+
+# Directory of the cache files, one JSON file per XRF folder. The cache is
+# kept with the user rather than in the (often shared) data folders, and is
+# plain JSON, so nothing read back from it can run code
+PARSE_CACHE_DIR = _user_cache_dir()
+
+# Bumped whenever the parsed .qan structure changes, invalidating old caches
+PARSE_CACHE_VERSION = 2
+
+# Parsed files of each folder loaded so far, keyed by folder and then by file
+# name, holding (modification time in ns, size, parsed QAN data)
+_FOLDER_CACHES: Dict[str, Dict[str, Tuple[int, int, Dict[str, Any]]]] = {}
+
+# Guards _FOLDER_CACHES and the entries in it; folder scans fill the cache on
+# a background thread while tables are generated on the GUI thread and CSV
+# files are written on a save thread
+_CACHE_LOCK = threading.Lock()
+
+# Serializes writes of the cache files
+_SAVE_LOCK = threading.Lock()
+
+
+def _cache_file(folder: str) -> str:
+    """
+    Get the path of the cache file of an XRF folder.
+    
+    Args:
+        folder: Absolute path of the folder
+    
+    Returns:
+        Path of the JSON cache file in PARSE_CACHE_DIR
+    """
+    digest = hashlib.sha1(folder.encode('utf-8')).hexdigest()
+    return os.path.join(PARSE_CACHE_DIR, f"{digest}.json")
+
+
+def _intern_strings(qan_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Intern the repeating strings of QAN data loaded from JSON, as the parser does.
+    """
+    for element_data in qan_data['elements']:
+        for field in ('element', 'omnian_scan', 'unit'):
+            element_data[field] = sys.intern(element_data[field])
+    return qan_data
+
+
+def _folder_cache(folder: str) -> Dict[str, Tuple[int, int, Dict[str, Any]]]:
+    """
+    Get the cache entries of a folder, loading its cache file on first use.
+    
+    The caller must hold _CACHE_LOCK.
+    
+    Args:
+        folder: Absolute path of the folder
+    
+    Returns:
+        Dictionary mapping file names to cache entries
+    """
+    entries = _FOLDER_CACHES.get(folder)
+    if entries is None:
+        entries = {}
+        try:
+            with open(_cache_file(folder), 'r', encoding='utf-8') as file:
+                stored = json.load(file)
+            if stored['version'] == PARSE_CACHE_VERSION and stored['folder'] == folder:
+                entries = {
+                    name: (mtime_ns, size, _intern_strings(qan_data))
+                    for name, (mtime_ns, size, qan_data) in stored['files'].items()
+                }
+        except Exception:
+            # A missing, unreadable or outdated cache is rebuilt from the files
+            pass
+        _FOLDER_CACHES[folder] = entries
+    return entries
+
+
+def _cache_key(file_path: str) -> Tuple[str, str, int, int]:
+    """
+    Split a file path into its cache folder and name, plus its current stat key.
+    """
+    stat = os.stat(file_path)
+    folder, name = os.path.split(os.path.abspath(file_path))
+    return folder, name, stat.st_mtime_ns, stat.st_size
+
+
+def save_parse_cache(folder: str) -> bool:
+    """
+    Write the cache entries of a folder to its cache file.
+    
+    Entries of files that no longer exist are dropped.
+    
+    Args:
+        folder: Path to the XRF folder
+    
+    Returns:
+        True if saved successfully, False otherwise
+    """
+    folder = os.path.abspath(folder)
+    cache_file = _cache_file(folder)
+    temp_file = cache_file + '.tmp'
+    
+    # Snapshots are taken under the save lock too, so an older snapshot never
+    # replaces a newer one on disk
+    with _SAVE_LOCK:
+        with _CACHE_LOCK:
+            entries = _folder_cache(folder)
+            for name in [name for name in entries if not os.path.exists(os.path.join(folder, name))]:
+                del entries[name]
+            snapshot = dict(entries)
+        
+        stored = {
+            'version': PARSE_CACHE_VERSION,
+            'folder': folder,
+            'files': {name: list(entry) for name, entry in snapshot.items()}
+        }
+        
+        # Write to a temporary file first so a reader never sees a partial cache
+        try:
+            os.makedirs(PARSE_CACHE_DIR, exist_ok=True)
+            with open(temp_file, 'w', encoding='utf-8') as file:
+                json.dump(stored, file)
+            os.replace(temp_file, cache_file)
+            return True
+        except Exception:
+            # Without a writable cache directory files are simply parsed again
+            return False
+
+
+def _parse_qan_files(
+    qan_files: List[str]
+) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Optional[Exception]]]:
+    """
+    Parse .qan files with threads for a few files and processes for many.
+    """
+    if len(qan_files) < PARALLEL_PARSE_MIN_FILES:
+        for qan_file, (qan_data, error) in zip(qan_files, read_qan_files_parallel(qan_files)):
+            yield qan_file, qan_data, error
+    else:
+        yield from iter_qan_files(qan_files)
+
+
+def iter_cached_qan_files(
+    qan_files: List[str]
+) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Optional[Exception]]]:
+    """
+    Parse .qan files through the parse cache, yielding results in order.
+    
+    Files missing from the cache, or changed since they were cached (by
+    modification time or size), are parsed together, and the cache files
+    of their folders are saved afterwards.
+    
+    The parsed data is shared with the cache and must not be modified.
+    
+    Args:
+        qan_files: List of paths to .qan files
+    
+    Yields:
+        Tuples of (file path, parsed QAN data, error); exactly one of the
+        parsed data and the error is None
+    """
+    results = {}
+    misses = {}
+    for qan_file in qan_files:
+        try:
+            folder, name, mtime_ns, size = _cache_key(qan_file)
+        except OSError:
+            # Left to the parser, which reports the missing file
+            misses[qan_file] = None
+            continue
+        
+        with _CACHE_LOCK:
+            entry = _folder_cache(folder).get(name)
+        if entry is not None and entry[0] == mtime_ns and entry[1] == size:
+            results[qan_file] = (entry[2], None)
+        else:
+            misses[qan_file] = (folder, name, mtime_ns, size)
+    
+    changed_folders = set()
+    for qan_file, qan_data, error in _parse_qan_files(list(misses)):
+        results[qan_file] = (qan_data, error)
+        key = misses[qan_file]
+        if error is None and key is not None:
+            folder, name, mtime_ns, size = key
+            with _CACHE_LOCK:
+                _folder_cache(folder)[name] = (mtime_ns, size, qan_data)
+            changed_folders.add(folder)
+    
+    for folder in changed_folders:
+        save_parse_cache(folder)
+    
+    for qan_file in qan_files:
+        qan_data, error = results[qan_file]
+        yield qan_file, qan_data, error
@@ -6,8 +6,26 @@ Handles metadata management for XRF projects.
 import os
 import json
 import re
+import functools
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+
+# orjson reads and writes the metadata file faster than the json module,
+# which is used when orjson is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Project folder name: the project number, optionally followed by _ProjectName
+PROJECT_FOLDER_RE = re.compile(r'^(\d+)(?:_(.+))?$')
+
+# Application config file with the operators, instruments, sample types and
+# missing data options offered by the wizard
+CONFIG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+    'data', 'config.json'
+)
 
 
 def extract_project_info_from_path(xrf_folder_path: str) -> Dict[str, str]:
@@ -21,46 +39,74 @@ def extract_project_info_from_path(xrf_folder_path: str) -> Dict[str, str]:
     Returns:
         Dictionary with client_name, project_number, and project_name
     """
-    info = {
-        'client_name': '',
-        'project_number': '',
-        'project_name': ''
+    client_name, project_number, project_name = _extract_project_info_cached(xrf_folder_path)
+    
+    return {
+        'client_name': client_name,
+        'project_number': project_number,
+        'project_name': project_name
     }
+
+
+@functools.lru_cache(maxsize=32)
+def _extract_project_info_cached(xrf_folder_path: str) -> Tuple[str, str, str]:
+    """
+    Extract (client name, project number, project name) from a folder path.
+    
+    Results are cached as tuples, so callers can't modify the cached values.
+    """
+    client_name = project_number = project_name = ''
     
+    # Normalize path separators
+    normalized_path = os.path.normpath(xrf_folder_path)
+    path_parts = normalized_path.split(os.sep)
+    
+    # Find the first XRF folder; without one there is nothing to extract
     try:
-        # Normalize path separators
-        normalized_path = os.path.normpath(xrf_folder_path)
-        path_parts = normalized_path.split(os.sep)
-        
-        # Find XRF folder index
-        xrf_index = -1
-        for i, part in enumerate(path_parts):
-            if part.lower() == 'xrf':
-                xrf_index = i
-                break
+        xrf_index = [part.lower() for part in path_parts].index('xrf')
+    except ValueError:
+        return client_name, project_number, project_name
+    
+    # Expected structure: ..\ClientName\Projects\#####_ProjectName\Data\XRF\
+    
+    # Try to get project folder (#####_ProjectName)
+    if xrf_index >= 3:  # Need at least XRF/Data/ProjectFolder
+        project_folder = path_parts[xrf_index - 2]
         
-        if xrf_index > 0:
-            # Expected structure: ..\ClientName\Projects\#####_ProjectName\Data\XRF\
-            
-            # Try to get project folder (#####_ProjectName)
-            if xrf_index >= 3:  # Need at least XRF/Data/ProjectFolder
-                project_folder = path_parts[xrf_index - 2]
-                
-                # Extract project number and name
-                match = re.match(r'^(\d+)(?:_(.+))?$', project_folder)
-                if match:
-                    info['project_number'] = match.group(1)
-                    info['project_name'] = match.group(2) or ''
-            
-            # Try to get client name (typically 2 levels above Data)
-            if xrf_index >= 4:  # Need at least XRF/Data/Project/Projects/Client
-                info['client_name'] = path_parts[xrf_index - 4]
+        # Extract project number and name
+        match = PROJECT_FOLDER_RE.match(project_folder)
+        if match:
+            project_number = match.group(1)
+            project_name = match.group(2) or ''
     
-    except Exception:
-        # If any error occurs during extraction, just return empty values
-        pass
+    # Try to get client name (typically 2 levels above Data)
+    if xrf_index >= 4:  # Need at least XRF/Data/Project/Projects/Client
+        client_name = path_parts[xrf_index - 4]
     
-    return info
+    return client_name, project_number, project_name
+
+
+@functools.lru_cache(maxsize=1)
+def _load_app_config_by_mtime(config_path: str, mtime_ns: int) -> Dict[str, Any]:
+    """
+    Parse the application config file, memoized on its path and modification time.
+    
+    The returned dictionary is shared between calls and must not be modified.
+    """
+    with open(config_path, 'r') as file:
+        return json.load(file)
+
+
+def load_app_config() -> Dict[str, Any]:
+    """
+    Load the application config, parsing the file only when it has changed.
+    
+    The returned dictionary is shared between calls and must not be modified.
+    
+    Returns:
+        Dictionary with the contents of config.json
+    """
+    return _load_app_config_by_mtime(CONFIG_PATH, os.stat(CONFIG_PATH).st_mtime_ns)
 
 
 def create_default_metadata() -> Dict[str, Any]:
@@ -95,14 +141,13 @@ def load_metadata(xrf_folder: str) -> Dict[str, Any]:
     """
     metadata_file = os.path.join(xrf_folder, 'metadata.json')
     
-    if os.path.exists(metadata_file):
-        try:
-            with open(metadata_file, 'r') as file:
-                return json.load(file)
-        except Exception:
-            # If error loading, return default
-            return create_default_metadata()
-    else:
+    # Open the file directly rather than checking for it first; a missing
+    # file is the one case that gets the project info from the path
+    try:
+        # Both parsers take the raw bytes and detect the UTF encoding
+        with open(metadata_file, 'rb') as file:
+            content = file.read()
+    except FileNotFoundError:
         # Create new metadata with info from path
         metadata = create_default_metadata()
         path_info = extract_project_info_from_path(xrf_folder)
@@ -111,6 +156,17 @@ def load_metadata(xrf_folder: str) -> Dict[str, Any]:
         metadata.update(path_info)
         
         return metadata
+    except Exception:
+        # If error loading, return default
+        return create_default_metadata()
+    
+    try:
+        if orjson is not None:
+            return orjson.loads(content)
+        return json.loads(content)
+    except Exception:
+        # If error parsing, return default
+        return create_default_metadata()
 
 
 def save_metadata(xrf_folder: str, metadata: Dict[str, Any]) -> bool:
@@ -127,8 +183,17 @@ def save_metadata(xrf_folder: str, metadata: Dict[str, Any]) -> bool:
     metadata_file = os.path.join(xrf_folder, 'metadata.json')
     
     try:
-        with open(metadata_file, 'w') as file:
-            json.dump(metadata, file, indent=2)
+        if orjson is not None:
+            content = orjson.dumps(metadata, option=orjson.OPT_INDENT_2)
+        else:
+            content = json.dumps(metadata, indent=2).encode()
+        
+        # Write to a temporary file first so a failed save never leaves a
+        # partly written metadata file behind
+        temp_file = metadata_file + '.tmp'
+        with open(temp_file, 'wb') as file:
+            file.write(content)
+        os.replace(temp_file, metadata_file)
         return True
     except Exception:
         return False
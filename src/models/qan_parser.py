@@ -5,7 +5,36 @@ Handles reading and parsing .qan files.
 
 import os
 import re
-from typing import Dict, List, Tuple, Any
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Tuple, Any, Iterator, Optional, Iterable
+
+# pyuring submits batched reads through Linux io_uring; without it (or on a
+# kernel without io_uring support) files are read one at a time with open()
+try:
+    import pyuring
+except ImportError:
+    pyuring = None
+
+
+# Minimum number of .qan files before parsing is spread over worker
+# processes; below this, process start-up costs more than parsing saves
+PARALLEL_PARSE_MIN_FILES = 32
+
+# Read buffer for .qan files; large enough to read a whole file in one call
+QAN_READ_BUFFER_SIZE = 1 << 16
+
+# Text encoding of .qan files, used for every way a file is read. The parsed
+# fields are ASCII; undecodable bytes (e.g. a Windows-1252 character in a
+# header) are replaced rather than stopping the file from being read
+QAN_FILE_ENCODING = 'utf-8'
+QAN_DECODE_ERRORS = 'replace'
+
+# Number of .qan files each worker process reads as one batch
+PARSE_BATCH_SIZE = 16
+
+# Maximum number of reads in flight on one io_uring submission queue
+URING_QUEUE_DEPTH = 256
 
 
 def read_qan_file(file_path: str) -> Dict[str, Any]:
@@ -18,25 +47,39 @@ def read_qan_file(file_path: str) -> Dict[str, Any]:
     Returns:
         Dictionary containing sample ID and element data
     """
-    if not os.path.exists(file_path):
-        raise FileNotFoundError(f"QAN file not found: {file_path}")
+    # Read the file in one call and split it in C, rather than building and
+    # stripping a string per line in Python; a missing file raises
+    # FileNotFoundError from open itself
+    with open(file_path, 'r', buffering=QAN_READ_BUFFER_SIZE,
+              encoding=QAN_FILE_ENCODING, errors=QAN_DECODE_ERRORS) as file:
+        text = file.read()
+    
+    return parse_qan_lines(text.splitlines(), file_path)
+
+
+def parse_qan_lines(lines: Iterable[str], file_path: str) -> Dict[str, Any]:
+    """
+    Extract the sample ID and element data from the lines of a .qan file.
     
+    Args:
+        lines: Lines of the .qan file, without line endings
+        file_path: Path the lines were read from, used for the fallback sample ID
+        
+    Returns:
+        Dictionary containing sample ID and element data
+    """
     # Initialize return structure
     qan_data = {
         'sample_id': '',
         'elements': []
     }
     
-    with open(file_path, 'r') as file:
-        lines = file.readlines()
-        
-    # Process each line
+    # Process each line; lines are not stripped, since split() ignores
+    # surrounding whitespace and records always start in the first column
     for line in lines:
-        line = line.strip()
-        
         # Sample ID line (S line)
         if line.startswith('S '):
-            parts = line.split()
+            parts = line.split(None, 2)
             if len(parts) > 1:
                 qan_data['sample_id'] = parts[1]
         
@@ -55,6 +98,169 @@ def read_qan_file(file_path: str) -> Dict[str, Any]:
     return qan_data
 
 
+def _read_qan_file_safe(file_path: str) -> Tuple[Optional[Dict[str, Any]], Optional[Exception]]:
+    """
+    Parse a .qan file in a worker process, returning any error instead of raising.
+    """
+    try:
+        return read_qan_file(file_path), None
+    except Exception as e:
+        return None, e
+
+
+def _read_files_uring(paths: List[str]) -> List[Tuple[Optional[bytes], Optional[Exception]]]:
+    """
+    Read whole files with one io_uring submission per URING_QUEUE_DEPTH files.
+    
+    Args:
+        paths: Paths of the files to read
+        
+    Returns:
+        List of (file contents, error) tuples in the order of paths
+    """
+    results = [(None, None)] * len(paths)
+    queue_depth = max(1, min(len(paths), URING_QUEUE_DEPTH))
+    
+    with pyuring.UringCtx(entries=queue_depth) as ring:
+        for start in range(0, len(paths), queue_depth):
+            pending = {}
+            try:
+                # Open every file in the batch and queue a read of its full size
+                for index in range(start, min(start + queue_depth, len(paths))):
+                    try:
+                        fd = os.open(paths[index], os.O_RDONLY)
+                    except OSError as e:
+                        results[index] = (None, e)
+                        continue
+                    try:
+                        buffer = bytearray(os.fstat(fd).st_size)
+                    except OSError as e:
+                        os.close(fd)
+                        results[index] = (None, e)
+                        continue
+                    pending[index] = (fd, buffer)
+                    ring.read_async(fd, buffer, 0, user_data=index)
+                
+                ring.submit()
+                
+                # Drain one completion per queued read
+                for _ in range(len(pending)):
+                    index, result = ring.wait_completion()
+                    fd, buffer = pending[index]
+                    if result < 0:
+                        results[index] = (None, OSError(-result, os.strerror(-result), paths[index]))
+                        continue
+                    # A short read leaves the rest of the file to a plain read
+                    data = bytes(buffer[:result])
+                    while len(data) < len(buffer):
+                        chunk = os.pread(fd, len(buffer) - len(data), len(data))
+                        if not chunk:
+                            break
+                        data += chunk
+                    results[index] = (data, None)
+            finally:
+                for fd, _ in pending.values():
+                    os.close(fd)
+    
+    return results
+
+
+def read_qan_files_batch(paths: List[str]) -> List[Tuple[Optional[Dict[str, Any]], Optional[Exception]]]:
+    """
+    Read and parse several .qan files, returning any error instead of raising.
+    
+    When pyuring is installed the reads are submitted together through
+    io_uring; otherwise, or if the kernel refuses to set up a ring, each file
+    is read with read_qan_file.
+    
+    Args:
+        paths: Paths to the .qan files
+        
+    Returns:
+        List of (parsed QAN data, error) tuples in the order of paths; exactly
+        one of the parsed data and the error is None
+    """
+    if pyuring is not None and paths:
+        try:
+            contents = _read_files_uring(paths)
+        except OSError:
+            contents = None
+        
+        if contents is not None:
+            results = []
+            for path, (data, error) in zip(paths, contents):
+                if error is not None:
+                    results.append((None, error))
+                    continue
+                try:
+                    results.append((parse_qan_lines(data.decode(QAN_FILE_ENCODING, QAN_DECODE_ERRORS).splitlines(), path), None))
+                except Exception as e:
+                    results.append((None, e))
+            return results
+    
+    return [_read_qan_file_safe(path) for path in paths]
+
+
+def read_qan_files_parallel(paths: List[str]) -> List[Tuple[Optional[Dict[str, Any]], Optional[Exception]]]:
+    """
+    Read and parse .qan files on a thread pool, returning any error instead of raising.
+    
+    Args:
+        paths: Paths to the .qan files
+        
+    Returns:
+        List of (parsed QAN data, error) tuples in the order of paths; exactly
+        one of the parsed data and the error is None
+    """
+    def read_safe(file_path):
+        try:
+            return read_qan_file(file_path), None
+        except Exception as e:
+            return None, e
+    
+    if len(paths) < 2:
+        return [read_safe(path) for path in paths]
+    
+    # File reads release the GIL, so threads overlap the waits on disk
+    with ThreadPoolExecutor(max_workers=min(len(paths), (os.cpu_count() or 1) * 4)) as executor:
+        return list(executor.map(read_safe, paths))
+
+
+def iter_qan_files(
+    qan_files: List[str]
+) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Optional[Exception]]]:
+    """
+    Parse .qan files, yielding results in the order the files were given.
+    
+    Batches of PARALLEL_PARSE_MIN_FILES or more are parsed across a process
+    pool, each worker reading PARSE_BATCH_SIZE files at a time with
+    read_qan_files_batch; smaller batches are read serially.
+    
+    Args:
+        qan_files: List of paths to .qan files
+        
+    Yields:
+        Tuples of (file path, parsed QAN data, error); exactly one of the
+        parsed data and the error is None
+    """
+    if len(qan_files) < PARALLEL_PARSE_MIN_FILES:
+        for qan_file in qan_files:
+            try:
+                yield qan_file, read_qan_file(qan_file), None
+            except Exception as e:
+                yield qan_file, None, e
+        return
+    
+    batches = [
+        qan_files[start:start + PARSE_BATCH_SIZE]
+        for start in range(0, len(qan_files), PARSE_BATCH_SIZE)
+    ]
+    with ProcessPoolExecutor() as executor:
+        for batch, results in zip(batches, executor.map(read_qan_files_batch, batches)):
+            for qan_file, (qan_data, error) in zip(batch, results):
+                yield qan_file, qan_data, error
+
+
 def parse_concentration_line(line: str) -> Dict[str, Any]:
     """
     Parse a concentration line (C line) from a .qan file.
@@ -66,6 +272,9 @@ def parse_concentration_line(line: str) -> Dict[str, Any]:
         Dictionary with element data or None if parsing failed
     """
     # Expected format: C Na5   0.11242 %    Na          27.4968                     9000
+    # The fields are whitespace separated, so a plain split() tokenizes the
+    # line; it is about twice as fast as matching a compiled regex with
+    # groups for the same fields, and accepts the same numeric forms float() does
     parts = line.split()
     
     # Need at least 4 parts: C, OmnianScan, Concentration, Unit
@@ -95,11 +304,13 @@ def parse_concentration_line(line: str) -> Dict[str, Any]:
         except ValueError:
             pass
     
+    # Element symbols, scan names and units repeat across every file, so they
+    # are interned to share one string object per distinct value
     return {
-        'element': element,
-        'omnian_scan': omnian_scan,
+        'element': sys.intern(element),
+        'omnian_scan': sys.intern(omnian_scan),
         'concentration': concentration,
-        'unit': unit,
+        'unit': sys.intern(unit),
         'signal': signal
     }
 
@@ -118,15 +329,19 @@ def get_sample_id_from_filename(file_path: str) -> str:
     return os.path.splitext(filename)[0]
 
 
-def find_qan_files(directory: str) -> List[str]:
+def find_qan_entries(directory: str) -> List[Tuple[str, str, str]]:
     """
-    Find all .qan files in a directory.
+    Find all .qan files in a directory, along with their file names and sample IDs.
+    
+    The directory is read with os.scandir, whose entries carry the file type
+    from the directory listing, so skipping folders named *.qan costs no stat.
     
     Args:
         directory: Directory to search for .qan files
         
     Returns:
-        List of paths to .qan files
+        List of (path, file name, sample ID) tuples, the sample ID being the
+        file name without its extension
     """
     if not os.path.exists(directory):
         raise FileNotFoundError(f"Directory not found: {directory}")
@@ -135,9 +350,22 @@ def find_qan_files(directory: str) -> List[str]:
     directory = os.path.abspath(directory)
     print(f"Searching for .qan files in: {directory}")
     
-    qan_files = []
-    for filename in os.listdir(directory):
-        if filename.lower().endswith('.qan'):
-            qan_files.append(os.path.join(directory, filename))
+    with os.scandir(directory) as entries:
+        return [
+            (entry.path, entry.name, os.path.splitext(entry.name)[0])
+            for entry in entries
+            if entry.name.lower().endswith('.qan') and entry.is_file()
+        ]
+
+
+def find_qan_files(directory: str) -> List[str]:
+    """
+    Find all .qan files in a directory.
     
-    return qan_files
+    Args:
+        directory: Directory to search for .qan files
+        
+    Returns:
+        List of paths to .qan files
+    """
+    return [path for path, _, _ in find_qan_entries(directory)]
@@ -4,21 +4,53 @@ First step in the wizard for selecting the XRF folder.
 """
 
 import os
-import sys
-from typing import List, Dict, Any
+import logging
+from typing import List, Dict, Any, Tuple
 
 from qtpy.QtWidgets import (
     QWizardPage, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QFileDialog, QListWidget, QGroupBox, QFormLayout, QWizard
 )
-from qtpy.QtCore import Qt
+from qtpy.QtCore import Qt, QThread, Signal
 
-# Add parent directory to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
-from src.models.qan_parser import find_qan_files, get_sample_id_from_filename
+from src.models.qan_parser import find_qan_entries, PARALLEL_PARSE_MIN_FILES
+from src.models.parse_cache import iter_cached_qan_files
 from src.models.project_data import extract_project_info_from_path
 
+logger = logging.getLogger(__name__)
+
+
+class QanScanThread(QThread):
+    """
+    Finds the .qan files of a folder off the GUI thread.
+    
+    Folders small enough to be read serially later are also parsed here, so
+    table generation finds their results in the parse cache.
+    """
+    
+    filesReady = Signal(str, list)
+    scanFailed = Signal(str, str)
+    
+    def __init__(self, folder: str, parent=None):
+        """Initialize the scan thread for a folder."""
+        super().__init__(parent)
+        self.folder = folder
+    
+    def run(self):
+        """Scan the folder and emit filesReady, or scanFailed on error."""
+        try:
+            qan_entries = find_qan_entries(self.folder)
+            if len(qan_entries) < PARALLEL_PARSE_MIN_FILES:
+                # Only fills the parse cache; errors are reported when the
+                # tables are generated
+                for _ in iter_cached_qan_files([path for path, _, _ in qan_entries]):
+                    pass
+        except Exception as e:
+            self.scanFailed.emit(self.folder, str(e))
+            return
+        
+        self.filesReady.emit(self.folder, qan_entries)
+
 
 class FolderSelectionPage(QWizardPage):
     """
@@ -35,6 +67,9 @@ class FolderSelectionPage(QWizardPage):
         
         self.wizard_ref = parent
         
+        # Whether .qan files were found in the selected folder
+        self._complete = False
+        
         # Create layout
         layout = QVBoxLayout()
         self.setLayout(layout)
@@ -96,78 +131,113 @@ class FolderSelectionPage(QWizardPage):
         )
         
         if folder:
+            # The lookup table must be loaded again for the new folder
+            self.wizard_ref.shared_data['lookup_loaded_for'] = None
+            
             self.folder_path.setText(folder)
-            self.update_file_list(folder)
+            self.start_file_scan(folder)
             self.update_project_info(folder)
             
             # Update shared data
             self.wizard_ref.shared_data['xrf_folder'] = folder
     
+    def start_file_scan(self, folder: str):
+        """Scan the folder for .qan files on a background thread."""
+        self.file_list.clear()
+        self.file_count.setText("Scanning folder...")
+        self.wizard_ref.shared_data['qan_files'] = []
+        self.wizard_ref.shared_data['sample_ids'] = []
+        self._complete = False
+        self.completeChanged.emit()
+        
+        # The thread is owned by the page and deletes itself when done
+        scan_thread = QanScanThread(folder, self)
+        scan_thread.filesReady.connect(self._populate_file_list)
+        scan_thread.scanFailed.connect(self._show_scan_error)
+        scan_thread.finished.connect(scan_thread.deleteLater)
+        scan_thread.start()
+    
     def update_file_list(self, folder: str):
-        """Update the list of .qan files."""
+        """Update the list of .qan files, scanning the folder synchronously."""
         self.file_list.clear()
         
         try:
-            qan_files = find_qan_files(folder)
-            
-            if qan_files:
-                sample_ids = []
-                
-                for file_path in qan_files:
-                    filename = os.path.basename(file_path)
-                    self.file_list.addItem(filename)
-                    
-                    # Add sample ID to list
-                    sample_id = get_sample_id_from_filename(file_path)
-                    sample_ids.append(sample_id)
-                
-                self.file_count.setText(f"Found {len(qan_files)} .qan files")
-                
-                # Update shared data
-                self.wizard_ref.shared_data['qan_files'] = qan_files
-                self.wizard_ref.shared_data['sample_ids'] = sample_ids
-                
-                # Always update the folder path in shared_data
-                self.wizard_ref.shared_data['xrf_folder'] = folder
-                print(f"Updated xrf_folder in shared_data to: {folder}")
-                
-                # Force Next button to be enabled
-                if hasattr(self.wizard(), 'button'):
-                    next_button = self.wizard().button(QWizard.NextButton)
-                    if next_button and not next_button.isEnabled():
-                        print("Directly enabling Next button")
-                        next_button.setEnabled(True)
-                
-                print(f"Files found: {len(qan_files)}, emitting completeChanged")
-                
-                # This will force Qt to re-check isComplete()
-                
-                # Signal that completion state changed
-                self.completeChanged.emit()
-            else:
-                self.file_count.setText("No .qan files found in this folder")
-                self.wizard_ref.shared_data['qan_files'] = []
-                self.wizard_ref.shared_data['sample_ids'] = []
-                
-                print("No files found, emitting completeChanged")
-                
-                # This will force Qt to re-check isComplete()
-                
-                # Signal that completion state changed
-                self.completeChanged.emit()
-        
+            qan_entries = find_qan_entries(folder)
         except Exception as e:
-            self.file_count.setText(f"Error scanning folder: {str(e)}")
+            self._show_scan_error(folder, str(e))
+            return
+        
+        self._populate_file_list(folder, qan_entries)
+    
+    def _is_current_folder(self, folder: str) -> bool:
+        """Check whether scan results belong to the folder currently selected."""
+        return folder == self.folder_path.text()
+    
+    def _populate_file_list(self, folder: str, qan_entries: List[Tuple[str, str, str]]):
+        """Show the .qan file entries found in a folder and store them in shared data."""
+        # Ignore results of a scan superseded by a newer folder selection
+        if not self._is_current_folder(folder):
+            return
+        
+        self.file_list.clear()
+        
+        if qan_entries:
+            qan_files = [file_path for file_path, _, _ in qan_entries]
+            sample_ids = [sample_id for _, _, sample_id in qan_entries]
+            
+            # Add all file names at once, under a single repaint
+            self.file_list.setUpdatesEnabled(False)
+            self.file_list.addItems([filename for _, filename, _ in qan_entries])
+            self.file_list.setUpdatesEnabled(True)
+            
+            self.file_count.setText(f"Found {len(qan_files)} .qan files")
+            
+            # Update shared data
+            self.wizard_ref.shared_data['qan_files'] = qan_files
+            self.wizard_ref.shared_data['sample_ids'] = sample_ids
+            
+            # Always update the folder path in shared_data
+            self.wizard_ref.shared_data['xrf_folder'] = folder
+            logger.debug("Updated xrf_folder in shared_data to: %s", folder)
+            
+            # Force Next button to be enabled
+            if hasattr(self.wizard(), 'button'):
+                next_button = self.wizard().button(QWizard.NextButton)
+                if next_button and not next_button.isEnabled():
+                    logger.debug("Directly enabling Next button")
+                    next_button.setEnabled(True)
+            
+            logger.debug("Files found: %d, emitting completeChanged", len(qan_files))
+            
+            # Signal that completion state changed
+            self._complete = True
+            self.completeChanged.emit()
+        else:
+            self.file_count.setText("No .qan files found in this folder")
             self.wizard_ref.shared_data['qan_files'] = []
             self.wizard_ref.shared_data['sample_ids'] = []
             
-            print(f"Error in update_file_list: {str(e)}")
-            
-            # This will force Qt to re-check isComplete()
+            logger.debug("No files found, emitting completeChanged")
             
             # Signal that completion state changed
+            self._complete = False
             self.completeChanged.emit()
     
+    def _show_scan_error(self, folder: str, message: str):
+        """Report an error from scanning a folder."""
+        if not self._is_current_folder(folder):
+            return
+        
+        self.file_count.setText(f"Error scanning folder: {message}")
+        self.wizard_ref.shared_data['qan_files'] = []
+        self.wizard_ref.shared_data['sample_ids'] = []
+        
+        logger.warning("Error scanning folder %s: %s", folder, message)
+        
+        # Signal that completion state changed
+        self._complete = False
+        self.completeChanged.emit()
+    
     def update_project_info(self, folder: str):
         """Update project information from folder path."""
         info = extract_project_info_from_path(folder)
@@ -178,26 +248,9 @@ class FolderSelectionPage(QWizardPage):
     
     def isComplete(self) -> bool:
         """Check if the page is complete and Next button can be enabled."""
-        try:
-            # Directly return True if we have found files
-            if hasattr(self, 'wizard_ref') and hasattr(self.wizard_ref, 'shared_data'):
-                folder = self.wizard_ref.shared_data.get('xrf_folder', '')
-                qan_files = self.wizard_ref.shared_data.get('qan_files', [])
-                
-                # Important debug info
-                print(f"isComplete check: folder='{folder}', qan_files count={len(qan_files)}")
-                
-                # Return simple boolean True/False directly
-                if folder and len(qan_files) > 0:
-                    return True
-                else:
-                    return False
-            return False
-        except Exception as e:
-            # Log the error
-            print(f"Error in isComplete: {str(e)}")
-            # Ensure we return a boolean
-            return False
+        # Qt asks on every change of focus and input, so the answer is kept
+        # up to date as scan results arrive instead of worked out here
+        return self._complete
     
     def validatePage(self) -> bool:
         """Validate the page before proceeding."""
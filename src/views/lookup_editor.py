@@ -3,24 +3,82 @@ Lookup editor page for XRF Data Manager.
 Third step in the wizard for editing the sample lookup table.
 """
 
-import os
-import sys
 from typing import List, Dict, Any
 
 from qtpy.QtWidgets import (
-    QWizardPage, QVBoxLayout, QTableWidget, QTableWidgetItem,
+    QWizardPage, QVBoxLayout, QTableView,
     QLabel, QHeaderView, QGroupBox, QHBoxLayout, QPushButton
 )
-from qtpy.QtCore import Qt
-
-# Add parent directory to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from qtpy.QtCore import Qt, QAbstractTableModel, QModelIndex
 
 from src.models.lookup_table import (
     load_lookup_table, save_lookup_table, 
-    create_lookup_table_from_sample_ids, merge_lookup_data
+    create_lookup_table_from_sample_ids, merge_lookup_data,
+    LOOKUP_COLUMNS
 )
 
+# Column headers shown for LOOKUP_COLUMNS, in the same order
+LOOKUP_HEADERS = ("Sample ID", "Notebook ID", "Client ID", "Report Abbreviation")
+
+
+class LookupTableModel(QAbstractTableModel):
+    """
+    Table model showing lookup table rows directly from their dictionaries.
+    
+    Edits are written back into the row dictionaries, so the list passed to
+    set_rows is always the current lookup table.
+    """
+    
+    def __init__(self, parent=None):
+        """Initialize the model with no rows."""
+        super().__init__(parent)
+        self._rows: List[Dict[str, str]] = []
+    
+    def rows(self) -> List[Dict[str, str]]:
+        """Get the lookup table rows shown by the model."""
+        return self._rows
+    
+    def set_rows(self, rows: List[Dict[str, str]]):
+        """Show a new list of lookup table rows."""
+        self.beginResetModel()
+        self._rows = rows
+        self.endResetModel()
+    
+    def rowCount(self, parent=QModelIndex()) -> int:
+        """Number of lookup table rows."""
+        return 0 if parent.isValid() else len(self._rows)
+    
+    def columnCount(self, parent=QModelIndex()) -> int:
+        """Number of lookup table columns."""
+        return 0 if parent.isValid() else len(LOOKUP_COLUMNS)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        """Get the value of a cell for display and editing."""
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        return self._rows[index.row()].get(LOOKUP_COLUMNS[index.column()], '')
+    
+    def setData(self, index, value, role=Qt.EditRole) -> bool:
+        """Write an edited value back into its row."""
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        self._rows[index.row()][LOOKUP_COLUMNS[index.column()]] = str(value)
+        self.dataChanged.emit(index, index, [role])
+        return True
+    
+    def flags(self, index):
+        """Make every column except the sample ID editable."""
+        flags = super().flags(index)
+        if index.isValid() and index.column() != 0:
+            flags |= Qt.ItemIsEditable
+        return flags
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        """Get the column headers."""
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return LOOKUP_HEADERS[section]
+        return super().headerData(section, orientation, role)
+
 
 class LookupEditorPage(QWizardPage):
     """
@@ -45,20 +103,16 @@ class LookupEditorPage(QWizardPage):
         self.table_group = QGroupBox("Sample Lookup Table")
         table_layout = QVBoxLayout()
         
-        self.table_widget = QTableWidget()
-        self.table_widget.setColumnCount(4)
-        self.table_widget.setHorizontalHeaderLabels([
-            "Sample ID", "Notebook ID", "Client ID", "Report Abbreviation"
-        ])
+        # The view reads cells straight from the lookup table dictionaries
+        self.table_model = LookupTableModel(self)
+        self.table_view = QTableView()
+        self.table_view.setModel(self.table_model)
         
         # Set column stretching
-        header = self.table_widget.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.Stretch)
-        header.setSectionResizeMode(1, QHeaderView.Stretch)
-        header.setSectionResizeMode(2, QHeaderView.Stretch)
-        header.setSectionResizeMode(3, QHeaderView.Stretch)
+        header = self.table_view.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.Stretch)
         
-        table_layout.addWidget(self.table_widget)
+        table_layout.addWidget(self.table_view)
         
         # Table buttons
         buttons_layout = QHBoxLayout()
@@ -86,6 +140,11 @@ class LookupEditorPage(QWizardPage):
         xrf_folder = self.wizard_ref.shared_data.get('xrf_folder', '')
         sample_ids = self.wizard_ref.shared_data.get('sample_ids', [])
         
+        # The table already shows this folder's lookup data, including any
+        # edits, when the page is revisited
+        if xrf_folder and self.wizard_ref.shared_data.get('lookup_loaded_for') == xrf_folder:
+            return
+        
         if xrf_folder and sample_ids:
             # Load existing lookup table
             existing_lookup = load_lookup_table(xrf_folder)
@@ -95,31 +154,14 @@ class LookupEditorPage(QWizardPage):
             
             # Update shared data
             self.wizard_ref.shared_data['lookup_table'] = lookup_table
+            self.wizard_ref.shared_data['lookup_loaded_for'] = xrf_folder
             
             # Populate table
             self.populate_table(lookup_table)
     
     def populate_table(self, lookup_table: List[Dict[str, str]]):
         """Populate the table with lookup data."""
-        self.table_widget.setRowCount(len(lookup_table))
-        
-        for row, data in enumerate(lookup_table):
-            # Sample ID (read-only)
-            sample_id_item = QTableWidgetItem(data.get('sample_id', ''))
-            sample_id_item.setFlags(sample_id_item.flags() & ~Qt.ItemIsEditable)
-            self.table_widget.setItem(row, 0, sample_id_item)
-            
-            # Notebook ID
-            notebook_id_item = QTableWidgetItem(data.get('notebook_id', ''))
-            self.table_widget.setItem(row, 1, notebook_id_item)
-            
-            # Client ID
-            client_id_item = QTableWidgetItem(data.get('client_id', ''))
-            self.table_widget.setItem(row, 2, client_id_item)
-            
-            # Report Abbreviation
-            report_abbr_item = QTableWidgetItem(data.get('report_abbreviation', ''))
-            self.table_widget.setItem(row, 3, report_abbr_item)
+        self.table_model.set_rows(lookup_table)
     
     def reset_table(self):
         """Reset the table to initial state with just sample IDs."""
@@ -132,21 +174,8 @@ class LookupEditorPage(QWizardPage):
     
     def validatePage(self) -> bool:
         """Validate the page before proceeding."""
-        # Get table data
-        lookup_table = []
-        
-        for row in range(self.table_widget.rowCount()):
-            sample_id = self.table_widget.item(row, 0).text()
-            notebook_id = self.table_widget.item(row, 1).text() if self.table_widget.item(row, 1) else ''
-            client_id = self.table_widget.item(row, 2).text() if self.table_widget.item(row, 2) else ''
-            report_abbreviation = self.table_widget.item(row, 3).text() if self.table_widget.item(row, 3) else ''
-            
-            lookup_table.append({
-                'sample_id': sample_id,
-                'notebook_id': notebook_id,
-                'client_id': client_id,
-                'report_abbreviation': report_abbreviation
-            })
+        # Edits were written into the rows, so the model holds the table as is
+        lookup_table = self.table_model.rows()
         
         # Update shared data
         self.wizard_ref.shared_data['lookup_table'] = lookup_table
@@ -3,26 +3,23 @@ Main window module for XRF Data Manager.
 Implements the wizard interface for the application.
 """
 
-import os
 import sys
+import logging
 from typing import Dict, Any, List
 
 from qtpy.QtWidgets import (
     QWizard, QWizardPage, QApplication, QVBoxLayout, QLabel,
     QMessageBox
 )
-from qtpy.QtCore import Qt
+from qtpy.QtCore import Qt, QTimer, QThread
 
-# Add parent directory to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
-# Import wizard pages
+# Import wizard pages; the later pages pull in pandas, openpyxl and the
+# plotting libraries, so they are imported once the wizard is on screen
 from src.views.folder_selection import FolderSelectionPage
 from src.views.metadata_form import MetadataFormPage
 from src.views.lookup_editor import LookupEditorPage
-from src.views.table_options import TableOptionsPage
-from src.views.preview_window import PreviewPage
-from src.views.ternary_diagram_page import TernaryDiagramPage
+
+logger = logging.getLogger(__name__)
 
 
 class XRFWizard(QWizard):
@@ -61,6 +58,9 @@ class XRFWizard(QWizard):
             'sample_ids': [],
             'metadata': {},
             'lookup_table': [],
+            # XRF folder the lookup table was last loaded for, so returning
+            # to the lookup page does not read the file again
+            'lookup_loaded_for': None,
             'generated_tables': {},
             'table_options': {
                 'ignore_tube_elements': True,
@@ -73,20 +73,17 @@ class XRFWizard(QWizard):
             }
         }
         
-        # Create and add pages
+        # Create and add the first pages; the rest are added as soon as the
+        # event loop starts, after the first page has been shown
         self.folder_page = FolderSelectionPage(self)
         self.metadata_page = MetadataFormPage(self)
         self.lookup_page = LookupEditorPage(self)
-        self.options_page = TableOptionsPage(self)
-        self.preview_page = PreviewPage(self)
-        self.ternary_page = TernaryDiagramPage(self)
         
         self.setPage(self.PAGE_FOLDER, self.folder_page)
         self.setPage(self.PAGE_METADATA, self.metadata_page)
         self.setPage(self.PAGE_LOOKUP, self.lookup_page)
-        self.setPage(self.PAGE_OPTIONS, self.options_page)
-        self.setPage(self.PAGE_PREVIEW, self.preview_page)
-        self.setPage(self.PAGE_TERNARY, self.ternary_page)
+        
+        QTimer.singleShot(0, self.add_late_pages)
         
         # Set wizard style
         self.setWizardStyle(QWizard.ModernStyle)
@@ -100,6 +97,33 @@ class XRFWizard(QWizard):
         # Connect signals
         self.finished.connect(self.on_wizard_finished)
     
+    def add_late_pages(self):
+        """Create and add the table, preview and ternary diagram pages."""
+        if self.page(self.PAGE_OPTIONS) is not None:
+            return
+        
+        from src.views.table_options import TableOptionsPage
+        from src.views.preview_window import PreviewPage
+        from src.views.ternary_diagram_page import TernaryDiagramPage
+        
+        self.options_page = TableOptionsPage(self)
+        self.preview_page = PreviewPage(self)
+        self.ternary_page = TernaryDiagramPage(self)
+        
+        self.setPage(self.PAGE_OPTIONS, self.options_page)
+        self.setPage(self.PAGE_PREVIEW, self.preview_page)
+        self.setPage(self.PAGE_TERNARY, self.ternary_page)
+    
+    def done(self, result: int):
+        """Close the wizard once the pages' background threads have finished."""
+        # A QThread destroyed while still running aborts the process, and the
+        # threads are owned by the pages, so they must stop before the pages
+        # go; waiting also lets a table save finish writing its file
+        for thread in self.findChildren(QThread):
+            thread.wait()
+        
+        super().done(result)
+    
     def on_wizard_finished(self, result: int):
         """Handle wizard completion."""
         if result == QWizard.Accepted:
@@ -116,7 +140,7 @@ class XRFWizard(QWizard):
         if page_id == self.PAGE_FOLDER:
             # If QAN files are found but Next is disabled, force enable it
             if self.shared_data.get('qan_files') and not self.button(QWizard.NextButton).isEnabled():
-                print("Force enabling Next button")
+                logger.debug("Force enabling Next button")
                 self.button(QWizard.NextButton).setEnabled(True)
 
 
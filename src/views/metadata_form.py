@@ -3,22 +3,40 @@ Metadata form page for XRF Data Manager.
 Second step in the wizard for entering project metadata.
 """
 
-import os
-import sys
-import json
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 from qtpy.QtWidgets import (
     QWizardPage, QVBoxLayout, QFormLayout, QLineEdit,
     QDateEdit, QComboBox, QLabel, QGroupBox
 )
-from qtpy.QtCore import Qt, QDate
+from qtpy.QtCore import Qt, QDate, QTimer
 
-# Add parent directory to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from src.models.project_data import load_metadata, save_metadata, load_app_config
 
-from src.models.project_data import load_metadata, save_metadata
+# Format of metadata dates (yyyy-MM-dd), parsed and written by Qt directly
+METADATA_DATE_FORMAT = Qt.ISODate
+
+# Pause in field edits, in milliseconds, before completion is checked again
+COMPLETE_CHECK_DELAY_MS = 50
+
+
+def _text_index(items: List[str]) -> Dict[str, int]:
+    """
+    Map each item text to its index in a combo box filled with the items.
+    
+    Like QComboBox.findText, repeated texts map to their first occurrence.
+    
+    Args:
+        items: Item texts in the order they were added to the combo box
+        
+    Returns:
+        Dictionary of item text to combo box index
+    """
+    index = {}
+    for i, text in enumerate(items):
+        index.setdefault(text, i)
+    return index
 
 
 class MetadataFormPage(QWizardPage):
@@ -86,42 +104,75 @@ class MetadataFormPage(QWizardPage):
         instructions.setWordWrap(True)
         layout.addWidget(instructions)
         
+        # Combo box indices by item text, filled with the dropdown options
+        self._operator_index: Dict[str, int] = {}
+        self._instrument_index: Dict[str, int] = {}
+        self._sample_type_index: Dict[str, int] = {}
+        
         # Load dropdown options
         self.load_dropdown_options()
         
+        # Fields whose changes can change whether the page is complete
+        self._watched_fields = (
+            self.project_number_edit, self.client_name_edit,
+            self.operator_combo, self.instrument_combo, self.sample_type_combo
+        )
+        
+        # Restarted on every field change, so a burst of keystrokes leads to a
+        # single completion check once typing pauses
+        self._complete_timer = QTimer(self)
+        self._complete_timer.setSingleShot(True)
+        self._complete_timer.setInterval(COMPLETE_CHECK_DELAY_MS)
+        self._complete_timer.timeout.connect(self.completeChanged)
+        
         # Connect signals for field changes
-        self.project_number_edit.textChanged.connect(self.on_field_changed)
-        self.client_name_edit.textChanged.connect(self.on_field_changed)
-        self.operator_combo.currentTextChanged.connect(self.on_field_changed)
-        self.instrument_combo.currentTextChanged.connect(self.on_field_changed)
-        self.sample_type_combo.currentTextChanged.connect(self.on_field_changed)
+        for signal in (
+            self.project_number_edit.textChanged,
+            self.client_name_edit.textChanged,
+            self.operator_combo.currentTextChanged,
+            self.instrument_combo.currentTextChanged,
+            self.sample_type_combo.currentTextChanged
+        ):
+            signal.connect(self.on_field_changed)
     
     def load_dropdown_options(self):
         """Load dropdown options from config file."""
+        # Fill each combo box with a single batch of items and one repaint,
+        # without reporting the intermediate current items
+        combos = (self.operator_combo, self.instrument_combo, self.sample_type_combo)
+        for combo in combos:
+            combo.setUpdatesEnabled(False)
+            combo.blockSignals(True)
+        
         try:
-            config_path = os.path.join(
-                os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-                'data', 'config.json'
-            )
+            # Parsed once and shared with the other pages
+            config = load_app_config()
             
-            with open(config_path, 'r') as file:
-                config = json.load(file)
-                
-                # Operators
-                self.operator_combo.clear()
-                self.operator_combo.addItems(config.get('operators', []))
-                
-                # Instruments
-                self.instrument_combo.clear()
-                for instrument in config.get('instruments', {}).keys():
-                    self.instrument_combo.addItem(instrument)
-                
-                # Sample types
-                self.sample_type_combo.clear()
-                self.sample_type_combo.addItems(config.get('sample_types', []))
+            # Operators
+            operators = config.get('operators', [])
+            self.operator_combo.clear()
+            self.operator_combo.addItems(operators)
+            self._operator_index = _text_index(operators)
+            
+            # Instruments
+            instruments = list(config.get('instruments', {}).keys())
+            self.instrument_combo.clear()
+            self.instrument_combo.addItems(instruments)
+            self._instrument_index = _text_index(instruments)
+            
+            # Sample types
+            sample_types = config.get('sample_types', [])
+            self.sample_type_combo.clear()
+            self.sample_type_combo.addItems(sample_types)
+            self._sample_type_index = _text_index(sample_types)
         
         except Exception as e:
             print(f"Error loading dropdown options: {str(e)}")
+        
+        finally:
+            for combo in combos:
+                combo.blockSignals(False)
+                combo.setUpdatesEnabled(True)
     
     def initializePage(self):
         """Initialize the page when it is shown."""
@@ -137,35 +188,54 @@ class MetadataFormPage(QWizardPage):
     
     def set_form_values(self, metadata: Dict[str, Any]):
         """Set form values from metadata."""
+        # Silence the fields while restoring them, then report the new
+        # completion state once instead of once per field
+        for field in self._watched_fields:
+            field.blockSignals(True)
+        try:
+            self._apply_form_values(metadata)
+        finally:
+            for field in self._watched_fields:
+                field.blockSignals(False)
+        
+        self._complete_timer.stop()
+        self.completeChanged.emit()
+    
+    def _apply_form_values(self, metadata: Dict[str, Any]):
+        """Write metadata values into the form fields."""
         # Date
         if 'date' in metadata:
             try:
-                date = QDate.fromString(metadata['date'], "yyyy-MM-dd")
-                self.date_edit.setDate(date)
+                date = QDate.fromString(metadata['date'], METADATA_DATE_FORMAT)
             except Exception:
-                self.date_edit.setDate(QDate.currentDate())
+                date = QDate()
+            
+            # Dates that cannot be parsed fall back to today
+            if not date.isValid():
+                date = QDate.currentDate()
+            self.date_edit.setDate(date)
         
         # Text fields
         self.project_number_edit.setText(metadata.get('project_number', ''))
         self.project_name_edit.setText(metadata.get('project_name', ''))
         self.client_name_edit.setText(metadata.get('client_name', ''))
         
-        # Dropdowns
+        # Dropdowns, looked up in the indices built with their items
         operator = metadata.get('operator', '')
         if operator:
-            index = self.operator_combo.findText(operator)
+            index = self._operator_index.get(operator, -1)
             if index >= 0:
                 self.operator_combo.setCurrentIndex(index)
         
         instrument = metadata.get('instrument', '')
         if instrument:
-            index = self.instrument_combo.findText(instrument)
+            index = self._instrument_index.get(instrument, -1)
             if index >= 0:
                 self.instrument_combo.setCurrentIndex(index)
         
         sample_type = metadata.get('sample_type', '')
         if sample_type:
-            index = self.sample_type_combo.findText(sample_type)
+            index = self._sample_type_index.get(sample_type, -1)
             if index >= 0:
                 self.sample_type_combo.setCurrentIndex(index)
     
@@ -173,7 +243,7 @@ class MetadataFormPage(QWizardPage):
         """Validate the page before proceeding."""
         # Get form values
         metadata = {
-            'date': self.date_edit.date().toString("yyyy-MM-dd"),
+            'date': self.date_edit.date().toString(METADATA_DATE_FORMAT),
             'project_number': self.project_number_edit.text(),
             'project_name': self.project_name_edit.text(),
             'client_name': self.client_name_edit.text(),
@@ -195,31 +265,18 @@ class MetadataFormPage(QWizardPage):
     def isComplete(self) -> bool:
         """Check if the page is complete and Next button can be enabled."""
         try:
-            # Basic validation - all fields should have values
-            project_number = self.project_number_edit.text() if hasattr(self, 'project_number_edit') else ""
-            client_name = self.client_name_edit.text() if hasattr(self, 'client_name_edit') else ""
-            operator = self.operator_combo.currentText() if hasattr(self, 'operator_combo') else ""
-            instrument = self.instrument_combo.currentText() if hasattr(self, 'instrument_combo') else ""
-            sample_type = self.sample_type_combo.currentText() if hasattr(self, 'sample_type_combo') else ""
-            
-            # Explicitly convert to bool to prevent any string return
-            result = bool(
-                project_number and
-                client_name and
-                operator and
-                instrument and
-                sample_type
+            # All fields should have values; stops at the first empty one
+            return bool(
+                self.project_number_edit.text() and
+                self.client_name_edit.text() and
+                self.operator_combo.currentText() and
+                self.instrument_combo.currentText() and
+                self.sample_type_combo.currentText()
             )
-            
-            # Ensure we return a boolean
-            if not isinstance(result, bool):
-                return False
-                
-            return result
         except Exception:
             # If any error occurs, return False as a fallback
             return False
-        
+    
     def on_field_changed(self):
-        """Signal that completion state may have changed."""
-        self.completeChanged.emit()
+        """Signal that completion state may have changed, once edits pause."""
+        self._complete_timer.start()
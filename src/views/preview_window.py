@@ -4,36 +4,57 @@ Fifth step in the wizard for previewing and saving generated tables.
 """
 
 import os
-import sys
-from typing import Dict, Any, List
+import functools
+from typing import Dict, Any, List, Callable
 
 from qtpy.QtWidgets import (
     QWizardPage, QVBoxLayout, QHBoxLayout, QPushButton,
     QLabel, QMessageBox, QGroupBox
 )
-from qtpy.QtCore import Qt
-
-# Add parent directory to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
-# Try to import pandasgui, handling the case if it's not installed
-try:
-    from pandasgui import show as pg_show
-except ImportError:
-    # Create a stub function to avoid errors
-    def pg_show(*args, **kwargs):
-        return None
+from qtpy.QtCore import Qt, QThread, Signal
 
 from src.controllers.excel_formatter import save_tables_to_excel
 from src.controllers.csv_exporter import save_to_csv
 
 
+class TableSaveThread(QThread):
+    """
+    Writes generated tables to a file off the GUI thread.
+    
+    Saving large tables to Excel can take seconds, during which the wizard
+    would otherwise stop responding.
+    """
+    
+    saved = Signal(str)
+    saveFailed = Signal(str, str)
+    
+    def __init__(self, save: Callable[[], Any], path: str, parent=None):
+        """Initialize the save thread for a save function and its file path."""
+        super().__init__(parent)
+        self.save = save
+        self.path = path
+    
+    def run(self):
+        """Run the save function and emit saved, or saveFailed on error."""
+        try:
+            self.save()
+        except Exception as e:
+            self.saveFailed.emit(self.path, str(e))
+            return
+        
+        self.saved.emit(self.path)
+
+
 class PreviewPage(QWizardPage):
     """
     Fifth page of the XRF Data Manager wizard.
     Allows previewing and saving of generated tables.
     """
     
+    # pandasgui.show, imported the first time tables are previewed since
+    # pandasgui is slow to import and optional
+    _pg_show = None
+    
     def __init__(self, parent=None):
         """Initialize the preview page."""
         super().__init__(parent)
@@ -44,6 +65,9 @@ class PreviewPage(QWizardPage):
         self.wizard_ref = parent
         self.pandas_gui = None
         
+        # Folder, project number and name the save paths were made for
+        self._paths_key = None
+        
         # Create layout
         layout = QVBoxLayout()
         self.setLayout(layout)
@@ -95,13 +119,19 @@ class PreviewPage(QWizardPage):
     def initializePage(self):
         """Initialize the page when it is shown."""
         # Get metadata
-        metadata = self.wizard_ref.shared_data.get('metadata', {})
-        xrf_folder = self.wizard_ref.shared_data.get('xrf_folder', '')
-        
-        # Generate filenames
+        shared_data = self.wizard_ref.shared_data
+        metadata = shared_data.get('metadata', {})
+        xrf_folder = shared_data.get('xrf_folder', '')
         project_number = metadata.get('project_number', '')
         project_name = metadata.get('project_name', '')
         
+        # The paths and label are already up to date when the page is
+        # revisited for the same project
+        paths_key = (xrf_folder, project_number, project_name)
+        if paths_key == self._paths_key:
+            return
+        
+        # Generate filenames
         if project_number and project_name:
             excel_filename = f"{project_number}_{project_name}_XRF_Tables.xlsx"
             csv_filename = f"{project_number}_{project_name}_XRF_concatenated.csv"
@@ -122,6 +152,7 @@ class PreviewPage(QWizardPage):
         # Store paths
         self.excel_path = excel_path
         self.csv_path = csv_path
+        self._paths_key = paths_key
     
     def show_tables_preview(self):
         """Show the generated tables in PandasGUI."""
@@ -135,18 +166,22 @@ class PreviewPage(QWizardPage):
             )
             return
         
-        try:
-            # Check if PandasGUI is available
-            if 'pg_show' not in globals() or pg_show is None:
+        # Check if PandasGUI is available
+        if PreviewPage._pg_show is None:
+            try:
+                from pandasgui import show as pg_show
+            except ImportError:
                 QMessageBox.critical(
                     self,
                     "PandasGUI Not Available",
                     "PandasGUI is not available. Please install it with 'pip install pandasgui'."
                 )
                 return
-            
+            PreviewPage._pg_show = staticmethod(pg_show)
+        
+        try:
             # Show tables in PandasGUI
-            self.pandas_gui = pg_show(*tables.values(), settings={'block': False})
+            self.pandas_gui = self._pg_show(*tables.values(), settings={'block': False})
             self.preview_label.setText(f"Showing {len(tables)} tables in PandasGUI.")
         
         except Exception as e:
@@ -157,7 +192,7 @@ class PreviewPage(QWizardPage):
             )
     
     def save_to_excel(self):
-        """Save the generated tables to an Excel file."""
+        """Save the generated tables to an Excel file on a background thread."""
         tables = self.wizard_ref.shared_data.get('generated_tables', {})
         
         if not tables:
@@ -168,34 +203,39 @@ class PreviewPage(QWizardPage):
             )
             return
         
-        try:
-            # Get options
-            options = self.wizard_ref.shared_data.get('table_options', {})
-            missing_data = options.get('missing_data_representation', '---')
-            
-            # Save to Excel
-            save_tables_to_excel(
-                tables=tables,
-                excel_path=self.excel_path,
-                metadata=self.wizard_ref.shared_data.get('metadata', {}),
-                missing_data=missing_data
-            )
-            
-            QMessageBox.information(
-                self,
-                "Excel File Saved",
-                f"Tables saved to Excel file:\n{self.excel_path}"
-            )
+        # Get options
+        options = self.wizard_ref.shared_data.get('table_options', {})
+        missing_data = options.get('missing_data_representation', '---')
         
-        except Exception as e:
-            QMessageBox.critical(
-                self,
-                "Error Saving Excel",
-                f"An error occurred while saving to Excel:\n\n{str(e)}"
-            )
+        # Save to Excel
+        save = functools.partial(
+            save_tables_to_excel,
+            tables=tables,
+            excel_path=self.excel_path,
+            metadata=self.wizard_ref.shared_data.get('metadata', {}),
+            missing_data=missing_data
+        )
+        self.start_save(save, self.excel_path, self.excel_button,
+                        self._excel_saved, self._excel_failed)
+    
+    def _excel_saved(self, excel_path: str):
+        """Report a successfully saved Excel file."""
+        QMessageBox.information(
+            self,
+            "Excel File Saved",
+            f"Tables saved to Excel file:\n{excel_path}"
+        )
+    
+    def _excel_failed(self, excel_path: str, message: str):
+        """Report an error from saving the Excel file."""
+        QMessageBox.critical(
+            self,
+            "Error Saving Excel",
+            f"An error occurred while saving to Excel:\n\n{message}"
+        )
     
     def save_to_csv(self):
-        """Save the generated tables to a CSV file."""
+        """Save the generated tables to a CSV file on a background thread."""
         tables = self.wizard_ref.shared_data.get('generated_tables', {})
         
         if not tables:
@@ -206,31 +246,61 @@ class PreviewPage(QWizardPage):
             )
             return
         
-        try:
-            # Get QAN files for direct processing
-            qan_files = self.wizard_ref.shared_data.get('qan_files', [])
-            
-            # Save to CSV with QAN files for enhanced processing
-            save_to_csv(
-                tables=tables,
-                csv_path=self.csv_path,
-                metadata=self.wizard_ref.shared_data.get('metadata', {}),
-                lookup_table=self.wizard_ref.shared_data.get('lookup_table', []),
-                qan_files=qan_files
-            )
-            
-            QMessageBox.information(
-                self,
-                "CSV File Saved",
-                f"Data saved to CSV file:\n{self.csv_path}"
-            )
+        # Get QAN files for direct processing
+        qan_files = self.wizard_ref.shared_data.get('qan_files', [])
         
-        except Exception as e:
-            QMessageBox.critical(
-                self,
-                "Error Saving CSV",
-                f"An error occurred while saving to CSV:\n\n{str(e)}"
-            )
+        # Save to CSV with QAN files for enhanced processing
+        save = functools.partial(
+            save_to_csv,
+            tables=tables,
+            csv_path=self.csv_path,
+            metadata=self.wizard_ref.shared_data.get('metadata', {}),
+            lookup_table=self.wizard_ref.shared_data.get('lookup_table', []),
+            qan_files=qan_files
+        )
+        self.start_save(save, self.csv_path, self.csv_button,
+                        self._csv_saved, self._csv_failed)
+    
+    def _csv_saved(self, csv_path: str):
+        """Report a successfully saved CSV file."""
+        QMessageBox.information(
+            self,
+            "CSV File Saved",
+            f"Data saved to CSV file:\n{csv_path}"
+        )
+    
+    def _csv_failed(self, csv_path: str, message: str):
+        """Report an error from saving the CSV file."""
+        QMessageBox.critical(
+            self,
+            "Error Saving CSV",
+            f"An error occurred while saving to CSV:\n\n{message}"
+        )
+    
+    def start_save(self, save: Callable[[], Any], path: str, button: QPushButton,
+                   on_saved: Callable[[str], None], on_failed: Callable[[str, str], None]):
+        """
+        Run a save function on a background thread.
+        
+        The button that started the save is disabled until it has finished,
+        so the same file is not written twice at once.
+        
+        Args:
+            save: Function writing the file, called without arguments
+            path: Path of the file being written
+            button: Button that started the save
+            on_saved: Called with the path once the file is written
+            on_failed: Called with the path and error message if saving fails
+        """
+        button.setEnabled(False)
+        
+        # The thread is owned by the page and deletes itself when done
+        save_thread = TableSaveThread(save, path, self)
+        save_thread.saved.connect(on_saved)
+        save_thread.saveFailed.connect(on_failed)
+        save_thread.finished.connect(lambda: button.setEnabled(True))
+        save_thread.finished.connect(save_thread.deleteLater)
+        save_thread.start()
     
     def validatePage(self) -> bool:
         """Validate the page before proceeding."""
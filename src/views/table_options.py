@@ -3,9 +3,6 @@ Table options page for XRF Data Manager.
 Fourth step in the wizard for selecting table generation options.
 """
 
-import os
-import sys
-import json
 from typing import Dict, Any, List
 
 from qtpy.QtWidgets import (
@@ -15,11 +12,9 @@ from qtpy.QtWidgets import (
 )
 from qtpy.QtCore import Qt
 
-# Add parent directory to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
 from src.controllers.data_processor import process_data
 from src.controllers.csv_exporter import create_concatenated_dataframe
+from src.models.project_data import load_app_config
 
 
 class TableOptionsPage(QWizardPage):
@@ -148,17 +143,11 @@ class TableOptionsPage(QWizardPage):
     def load_missing_data_options(self):
         """Load missing data representation options from config."""
         try:
-            config_path = os.path.join(
-                os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-                'data', 'config.json'
-            )
+            config = load_app_config()
             
-            with open(config_path, 'r') as file:
-                config = json.load(file)
-                
-                # Missing data options
-                self.missing_combo.clear()
-                self.missing_combo.addItems(config.get('missing_data_options', ['---', 'na', 'ND', 'BDL']))
+            # Missing data options
+            self.missing_combo.clear()
+            self.missing_combo.addItems(config.get('missing_data_options', ['---', 'na', 'ND', 'BDL']))
         
         except Exception as e:
             print(f"Error loading missing data options: {str(e)}")
@@ -195,20 +184,14 @@ class TableOptionsPage(QWizardPage):
         
         if instrument:
             try:
-                config_path = os.path.join(
-                    os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-                    'data', 'config.json'
-                )
+                config = load_app_config()
                 
-                with open(config_path, 'r') as file:
-                    config = json.load(file)
-                    
-                    if instrument in config.get('instruments', {}):
-                        tube_elements = config['instruments'][instrument].get('tube_elements', [])
-                        if tube_elements:
-                            elements_str = ', '.join(tube_elements)
-                            self.ignore_tube_checkbox.setText(f"Ignore tube elements ({elements_str})")
-                            return
+                if instrument in config.get('instruments', {}):
+                    tube_elements = config['instruments'][instrument].get('tube_elements', [])
+                    if tube_elements:
+                        elements_str = ', '.join(tube_elements)
+                        self.ignore_tube_checkbox.setText(f"Ignore tube elements ({elements_str})")
+                        return
             
             except Exception:
                 pass
@@ -516,7 +499,7 @@ class TableOptionsPage(QWizardPage):
             generated_tables: Dictionary of generated tables
             ternary_systems: Dictionary of ternary systems and their required oxides
         """
-        import pandas as pd
+        import numpy as np
         
         print("Using fallback: extracting ternary data from wide-format tables")
         
@@ -551,9 +534,24 @@ class TableOptionsPage(QWizardPage):
         self.wizard_ref.shared_data['ternary_labels_by_system'] = {}
         
         # Get sample columns (everything except Z and Element)
-        sample_columns = [col for col in oxide_table.columns if col not in ['Z', 'Element']]
+        sample_positions = [
+            position for position, col in enumerate(oxide_table.columns)
+            if col not in ['Z', 'Element']
+        ]
+        sample_columns = oxide_table.columns[sample_positions].tolist()
         print(f"Sample columns: {sample_columns}")
         
+        # Pull the sample values out once as a float array (NaN as 0) and
+        # index it by position instead of a .loc lookup per cell
+        sample_values = np.nan_to_num(
+            oxide_table.iloc[:, sample_positions].to_numpy(dtype=np.float64, na_value=np.nan)
+        )
+        
+        # Row position of the first row for each element/oxide
+        element_positions = {}
+        for position, element in enumerate(oxide_table['Element'].to_numpy()):
+            element_positions.setdefault(element, position)
+        
         # Extract data for each ternary system
         for system_name, required_oxides in ternary_systems.items():
             print(f"\nProcessing ternary system: {system_name}")
@@ -562,14 +560,7 @@ class TableOptionsPage(QWizardPage):
             labels = []
             
             # Check which oxides are available in the table
-            available_oxides = []
-            oxide_indices = {}
-            
-            for oxide in required_oxides:
-                oxide_rows = oxide_table[oxide_table['Element'] == oxide]
-                if not oxide_rows.empty:
-                    available_oxides.append(oxide)
-                    oxide_indices[oxide] = oxide_rows.index[0]
+            available_oxides = [oxide for oxide in required_oxides if oxide in element_positions]
             
             print(f"Available oxides: {available_oxides}")
             
@@ -577,20 +568,11 @@ class TableOptionsPage(QWizardPage):
                 print(f"Skipping {system_name}: only {len(available_oxides)}/3 oxides available")
                 continue
             
+            oxide_values = sample_values[[element_positions[oxide] for oxide in required_oxides]]
+            
             # Process each sample
-            for sample_col in sample_columns:
-                values = []
-                
-                for oxide in required_oxides:
-                    if oxide in oxide_indices:
-                        value = oxide_table.loc[oxide_indices[oxide], sample_col]
-                        # Handle NaN values
-                        if pd.isna(value):
-                            values.append(0.0)
-                        else:
-                            values.append(float(value))
-                    else:
-                        values.append(0.0)
+            for sample_number, sample_col in enumerate(sample_columns):
+                values = oxide_values[:, sample_number].tolist()
                 
                 # Only include samples with positive sum
                 total = sum(values)
@@ -0,0 +1,78 @@
+"""
+Test script to verify the concatenated CSV export.
+Checks that streaming rows from .qan files writes the same CSV as
+building the concatenated DataFrame first.
+"""
+
+import sys
+import os
+import tempfile
+
+import pandas as pd
+
+# Add src directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+QAN_FILES = {
+    'SAMPLE_A': [
+        "S SAMPLE_A  2024-01-01",
+        "D ignored",
+        "C Si0   25.31000 %    Si          27.4968                     9000",
+        "C Al1    7.20500 %    Al          12.1000                     9000",
+        "C Zn0  120.00000 ppm  Zn           3.5000                     9000",
+        "C Ag0    1.20000 kcps Ag           1.2000                     9000",
+        "C Xx0   15.00000 ppm  Xx           0.1000                     9000",
+    ],
+    'SAMPLE_B': [
+        "S SAMPLE_B  2024-01-01",
+        "C Fe2    4.10000 %    Fe          40.0000                     9000",
+        "C Cl0    0.00000 %    Cl           0.0000                     9000",
+        "C Sr0  310.50000 ppm  Sr           8.2500                     9000",
+    ],
+}
+
+
+def write_qan_files(directory):
+    """Write the example .qan files and return their paths."""
+    paths = []
+    for sample_id, lines in QAN_FILES.items():
+        path = os.path.join(directory, f"{sample_id}.qan")
+        with open(path, 'w') as file:
+            file.write("\n".join(lines) + "\n")
+        paths.append(path)
+    return paths
+
+
+def test_streaming_csv_matches_dataframe():
+    """Streamed CSV rows must match the concatenated DataFrame."""
+    from src.controllers.csv_exporter import (
+        save_to_csv, create_concatenated_dataframe_from_qan
+    )
+
+    lookup_table = [
+        {'sample_id': 'SAMPLE_A', 'notebook_id': 'NB-1', 'client_id': 'C-1', 'report_abbreviation': 'A'},
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        qan_files = write_qan_files(directory)
+        csv_path = os.path.join(directory, 'concatenated.csv')
+
+        assert save_to_csv({}, csv_path, {}, lookup_table, qan_files)
+        streamed_df = pd.read_csv(csv_path, keep_default_na=False, na_values=[''])
+
+        expected_df = create_concatenated_dataframe_from_qan(qan_files, {}, lookup_table)
+
+    print(f"Streamed CSV rows: {len(streamed_df)}")
+
+    # kcps and zero concentration rows are skipped
+    assert streamed_df['Element'].tolist() == ['Si', 'Al', 'Zn', 'Xx', 'Fe', 'Sr']
+    assert streamed_df['Line'].tolist() == list(range(1, 7))
+    assert streamed_df.columns.tolist() == expected_df.columns.tolist()
+
+    expected_df = expected_df.replace('', float('nan'))
+    pd.testing.assert_frame_equal(streamed_df, expected_df, check_dtype=False)
+
+
+if __name__ == "__main__":
+    test_streaming_csv_matches_dataframe()
+    print("\n🎉 CSV export test passed!")
@@ -0,0 +1,100 @@
+"""
+Test script to verify the summary rows of concentration tables.
+Summary rows are computed from the unrounded concentrations and rounded
+together with the element rows, so a Total or Balance can differ from the
+sum of the rounded values shown above it.
+"""
+
+import os
+import tempfile
+
+import src.models.parse_cache as parse_cache
+from src.controllers.data_processor import generate_concentration_table, process_data
+
+
+def element(symbol, concentration, unit):
+    """Build the parsed data of one concentration line."""
+    return {
+        'element': symbol,
+        'omnian_scan': f"{symbol}0",
+        'concentration': concentration,
+        'unit': unit,
+        'signal': None
+    }
+
+
+SAMPLES = [{
+    'sample_id': 'SAMPLE_A',
+    'notebook_id': '',
+    'client_id': '',
+    'report_abbreviation': '',
+    'elements': [
+        element('Si', 25.316, '%'),
+        element('Al', 7.206, '%'),
+        element('Zn', 954.0, 'ppm'),
+        element('Sr', 764.0, 'ppm'),
+    ],
+}]
+
+
+def test_trace_total_uses_unrounded_values():
+    """The trace Total is the rounded sum, not the sum of the rounded rows."""
+    table = generate_concentration_table(SAMPLES, 'absolute', 'trace', round_digits=-1)
+
+    column = table['SAMPLE_A']
+    assert column['Zn'] == 950.0
+    assert column['Sr'] == 760.0
+    # 954 + 764 = 1718 -> 1720, while the rows shown add up to 1710
+    assert column['Total'] == 1720.0
+
+
+QAN_LINES = [
+    "S SAMPLE_A  2024-01-01\n",
+    "C Si0   25.31600 %    Si          27.4968                     9000\n",
+    "C Al0   7.20600 %    Al          27.4968                     9000\n",
+    "C Zn0   954.00000 ppm    Zn          27.4968                     9000\n",
+    "C Sr0   764.00000 ppm    Sr          27.4968                     9000\n",
+]
+
+OPTIONS = {
+    'generate_absolute': True,
+    'generate_relative': False,
+    'generate_major': True,
+    'generate_trace': True,
+    'ignore_tube_elements': False,
+}
+
+
+def test_major_balance_uses_unrounded_values():
+    """Trace and Balance rows of a major table come from unrounded values."""
+    cache_dir = parse_cache.PARSE_CACHE_DIR
+    with tempfile.TemporaryDirectory() as data_dir, tempfile.TemporaryDirectory() as temp_cache_dir:
+        parse_cache.PARSE_CACHE_DIR = temp_cache_dir
+        parse_cache._FOLDER_CACHES.clear()
+        try:
+            path = os.path.join(data_dir, 'SAMPLE_A.qan')
+            with open(path, 'w') as file:
+                file.writelines(QAN_LINES)
+            tables = process_data(data_dir, [path], {}, [], OPTIONS)
+        finally:
+            parse_cache.PARSE_CACHE_DIR = cache_dir
+            parse_cache._FOLDER_CACHES.clear()
+
+    table = tables['absolute_major_elements']
+    assert table['Element'].tolist() == ['Al', 'Si', 'Trace', 'Balance', 'Total']
+    column = table['SAMPLE_A']
+    assert column['Si'] == 25.32
+    assert column['Al'] == 7.21
+    # 954 + 764 ppm = 0.1718 wt%, rather than the rounded trace rows plus
+    # the trace table's own Total row
+    assert column['Trace'] == 0.17
+    # 100 - (25.316 + 7.206 + 0.1718) = 67.3062 -> 67.31; the rounded rows
+    # shown would give 100 - (25.32 + 7.21 + 0.17) = 67.30
+    assert column['Balance'] == 67.31
+    assert column['Total'] == 100.0
+
+
+if __name__ == "__main__":
+    test_trace_total_uses_unrounded_values()
+    test_major_balance_uses_unrounded_values()
+    print("\n🎉 Summary row tests passed!")
@@ -0,0 +1,114 @@
+"""
+Test script to verify the parse cache.
+Checks that cached .qan files are reused while their modification time and
+size are unchanged, and parsed again once either changes, and that the cache
+can be saved while another thread adds to it.
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+import src.models.parse_cache as parse_cache
+
+
+def write_qan_file(path, concentration):
+    """Write a one-element .qan file with a fixed-width concentration."""
+    with open(path, 'w') as file:
+        file.write("S SAMPLE_A  2024-01-01\n")
+        file.write(f"C Si0   {concentration} %    Si          27.4968                     9000\n")
+
+
+def read_concentration(path):
+    """Read a .qan file through the parse cache and return its concentration."""
+    [(_, qan_data, error)] = parse_cache.iter_cached_qan_files([path])
+    assert error is None
+    return qan_data['elements'][0]['concentration']
+
+
+def test_cache_follows_file_stat():
+    """Cached results are reused for an unchanged stat and dropped otherwise."""
+    cache_dir = parse_cache.PARSE_CACHE_DIR
+    with tempfile.TemporaryDirectory() as data_dir, tempfile.TemporaryDirectory() as temp_cache_dir:
+        parse_cache.PARSE_CACHE_DIR = temp_cache_dir
+        parse_cache._FOLDER_CACHES.clear()
+        try:
+            path = os.path.join(data_dir, 'SAMPLE_A.qan')
+            write_qan_file(path, '25.31000')
+            assert read_concentration(path) == 25.31
+
+            # The cache is written to the cache directory as JSON, not into
+            # the data folder
+            assert os.listdir(data_dir) == ['SAMPLE_A.qan']
+            assert [name for name in os.listdir(temp_cache_dir) if name.endswith('.json')]
+
+            # Same size and modification time: the cached result is used,
+            # also after reloading the cache file
+            stat = os.stat(path)
+            write_qan_file(path, '26.31000')
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            parse_cache._FOLDER_CACHES.clear()
+            assert read_concentration(path) == 25.31
+
+            # A new modification time makes the file be parsed again
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            assert read_concentration(path) == 26.31
+
+            # So does a new size
+            write_qan_file(path, '7.2050')
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            assert read_concentration(path) == 7.205
+        finally:
+            parse_cache.PARSE_CACHE_DIR = cache_dir
+            parse_cache._FOLDER_CACHES.clear()
+
+
+def test_save_while_inserting(monkeypatch):
+    """Saving a folder's cache is safe while another thread adds entries."""
+    cache_dir = parse_cache.PARSE_CACHE_DIR
+    with tempfile.TemporaryDirectory() as data_dir, tempfile.TemporaryDirectory() as temp_cache_dir:
+        parse_cache.PARSE_CACHE_DIR = temp_cache_dir
+        parse_cache._FOLDER_CACHES.clear()
+        try:
+            paths = []
+            for index in range(100):
+                path = os.path.join(data_dir, f'SAMPLE_{index}.qan')
+                write_qan_file(path, '25.31000')
+                paths.append(path)
+
+            errors = []
+
+            def insert_entries():
+                try:
+                    for start in range(0, len(paths), 10):
+                        for _, _, error in parse_cache.iter_cached_qan_files(paths[start:start + 10]):
+                            assert error is None
+                except Exception as error:
+                    errors.append(error)
+
+            # Slow down the existence checks of a save, so that the inserts
+            # land while it goes through the entries
+            exists = os.path.exists
+
+            def slow_exists(path):
+                time.sleep(0.0005)
+                return exists(path)
+
+            monkeypatch.setattr(parse_cache.os.path, 'exists', slow_exists)
+
+            inserter = threading.Thread(target=insert_entries)
+            inserter.start()
+            while inserter.is_alive():
+                assert parse_cache.save_parse_cache(data_dir)
+            inserter.join()
+            monkeypatch.undo()
+
+            assert not errors
+            assert parse_cache.save_parse_cache(data_dir)
+            parse_cache._FOLDER_CACHES.clear()
+            with parse_cache._CACHE_LOCK:
+                assert len(parse_cache._folder_cache(os.path.abspath(data_dir))) == len(paths)
+        finally:
+            parse_cache.PARSE_CACHE_DIR = cache_dir
+            parse_cache._FOLDER_CACHES.clear()